@@ -0,0 +1,168 @@
+import mmap
+import struct
+import threading
+import time
+import numpy as np
+from typing import BinaryIO, Callable, Iterator, Optional, Sequence, Tuple
+from rx_engine import RawFrame
+
+# File header, followed by records of RECORD_HEADER + data bytes:
+# timestamp (float64 s), arbitration id (uint32), bus index (uint8),
+# data length (uint8), all little endian
+LOG_MAGIC = b"RCANLOG1"
+RECORD_HEADER = struct.Struct("<dIBB")
+
+
+class CanLogRecorder:
+    """
+    Appends received frames of any bus to a binary log. Safe to call from
+    several RX threads, writes go through a buffered file.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1 << 16):
+        self.path = path
+        self.frames = 0
+        self._lock = threading.Lock()
+        self._file: Optional[BinaryIO] = open(path, "ab", buffering=buffer_size)
+        if self._file.tell() == 0:
+            self._file.write(LOG_MAGIC)
+
+    def record(self, bus_index: int, message) -> None:
+        data = message.data
+        timestamp = getattr(message, "timestamp", None) or time.time()
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(
+                RECORD_HEADER.pack(
+                    timestamp, message.arbitration_id, bus_index, len(data)
+                )
+            )
+            self._file.write(data)
+            self.frames += 1
+
+    def record_batch(self, bus_index: int, frames) -> None:
+        now = time.time()
+        with self._lock:
+            if self._file is None:
+                return
+            write = self._file.write
+            for frame in frames:
+                data = frame.data
+                write(
+                    RECORD_HEADER.pack(
+                        frame.timestamp or now,
+                        frame.arbitration_id,
+                        bus_index,
+                        len(data),
+                    )
+                )
+                write(data)
+            self.frames += len(frames)
+
+    def tap(self, bus_index: int, handler: Callable) -> Callable:
+        """Wrap an RX handler so every frame is recorded before it is handled"""
+
+        def recording_handler(message):
+            self.record(bus_index, message)
+            return handler(message)
+
+        return recording_handler
+
+    def tap_batch(self, bus_index: int, handler: Callable) -> Callable:
+        """Wrap a batch handler so every batch is recorded before it is handled"""
+
+        def recording_handler(frames):
+            self.record_batch(bus_index, frames)
+            return handler(frames)
+
+        return recording_handler
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        print(f"CAN log: {self.frames} frames recorded to {self.path}")
+
+
+class CanLogReplay:
+    """
+    Memory-maps a recorded log and feeds its frames to per-bus handlers at
+    the recorded pace scaled by speed, or as fast as possible with speed 0.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[: len(LOG_MAGIC)] != LOG_MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a CAN log")
+        self.offsets, self.timestamps = self._build_index()
+
+    def _build_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Record offsets and timestamps, a truncated last record is ignored"""
+        offsets = []
+        timestamps = []
+        unpack_from = RECORD_HEADER.unpack_from
+        header_size = RECORD_HEADER.size
+        end = len(self._mmap)
+        offset = len(LOG_MAGIC)
+        while offset + header_size <= end:
+            timestamp, _, _, length = unpack_from(self._mmap, offset)
+            if offset + header_size + length > end:
+                break
+            offsets.append(offset)
+            timestamps.append(timestamp)
+            offset += header_size + length
+        return np.array(offsets, dtype=np.int64), np.array(timestamps)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def duration(self) -> float:
+        """Recorded time span in seconds"""
+        if len(self.timestamps) < 2:
+            return 0.0
+        return float(self.timestamps[-1] - self.timestamps[0])
+
+    def frames(self) -> Iterator[Tuple[int, RawFrame]]:
+        """(bus index, frame) of every record, data copied out of the map"""
+        mm = self._mmap
+        unpack_from = RECORD_HEADER.unpack_from
+        header_size = RECORD_HEADER.size
+        for offset in self.offsets.tolist():
+            timestamp, can_id, bus_index, length = unpack_from(mm, offset)
+            start = offset + header_size
+            yield bus_index, RawFrame(can_id, timestamp, mm[start : start + length])
+
+    def replay(
+        self,
+        handlers: Sequence[Callable],
+        speed: float = 1.0,
+        stop_event: Optional[threading.Event] = None,
+    ) -> Tuple[int, float]:
+        """
+        Feed every frame to handlers[bus index]. Returns (frames, seconds),
+        with speed 0 that is the throughput of the handlers.
+        """
+        count = 0
+        start = time.perf_counter()
+        first = float(self.timestamps[0]) if len(self.timestamps) else 0.0
+        for bus_index, frame in self.frames():
+            if stop_event is not None and stop_event.is_set():
+                break
+            if speed > 0:
+                delay = (frame.timestamp - first) / speed - (
+                    time.perf_counter() - start
+                )
+                if delay > 0:
+                    time.sleep(delay)
+            if bus_index < len(handlers):
+                handlers[bus_index](frame)
+            count += 1
+        return count, time.perf_counter() - start
+
+    def close(self) -> None:
+        self._mmap.close()
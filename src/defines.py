@@ -1,5 +1,8 @@
 from enum import Enum
+from dataclasses import dataclass
 import io
+import os
+import socket
 from multiprocessing import Manager
 import pygame
 import cantools
@@ -23,6 +26,73 @@ fps = 30
 # game settings
 objects = 0
 
+# decode radar object-list frames once per complete scan instead of per frame
+radar_batch_decode = False
+
+# frames buffered per CAN bus between reception and decoding
+rx_queue_size = 512
+
+# drain each CAN bus in batches into a reusable buffer (raw socketcan on the Pi)
+rx_batch_read = False
+rx_batch_size = 64
+
+# seconds between background CPU temperature samples
+temperature_sample_interval = 2.0
+
+# rendered text surfaces kept by the shared text cache
+text_cache_size = 512
+
+# per-stage frame timing (toggle the overlay with P), dumped to the log and
+# optionally appended to a CSV file every profiler_dump_interval seconds
+profiler_enabled = False
+profiler_window = 300
+profiler_dump_interval = 10.0
+profiler_csv_path = ""
+
+# extrapolate object positions from the last radar scan to the render instant,
+# in screen pixels per velocity unit and second, for at most max_dt seconds
+motion_prediction_enabled = True
+motion_prediction_scale = 1.0
+motion_prediction_max_dt = 0.25
+
+# radar object tracking across scans: track table size, association gate in
+# screen units, alpha-beta filter gains, scans a track survives without a
+# detection and the time one scan may take before it counts as an overrun
+track_capacity = 128
+track_gate_distance = 40.0
+track_alpha = 0.5
+track_beta = 0.1
+track_max_misses = 5
+track_time_budget = 0.002
+# objects below this data confidence are empty slots, not detections
+track_min_data_conf = 1
+
+# append the received frames of both buses to this binary log ("" = off)
+can_log_record_path = ""
+# off the Pi, replay this log instead of the simulator ("" = off), at
+# can_log_replay_speed times the recorded pace (0 = as fast as possible)
+can_log_replay_path = ""
+can_log_replay_speed = 1.0
+
+# cyclic TX after a stall: "skip" sends once for the latest missed deadline,
+# "catch_up" sends up to tx_max_catch_up missed cycles back to back
+tx_overrun_policy = "skip"
+tx_max_catch_up = 3
+
+# let the bus (kernel BCM on socketcan) send the 60ms E2E protected messages
+# from precomputed counter cycles instead of a Python thread
+tx_offload_mode = False
+
+# check E2E protection (CRC and counter) of the received radar frames,
+# frames that fail are dropped ("drop") or only counted ("flag"); a counter
+# jump up to rx_e2e_max_delta_counter is accepted as lost frames
+rx_e2e_enabled = True
+rx_e2e_policy = "flag"
+rx_e2e_max_delta_counter = 3
+
+# frames kept by the CAN sniffer ring buffer
+can_sniffer_capacity = 4096
+
 # colors
 gray = (100, 100, 100)
 yellow = (255, 232, 0)
@@ -49,6 +119,7 @@ class Vehicle(pygame.sprite.Sprite):
         self.height = height
         self.speed = speed
         self.dataConfidence = dataConfidence
+        self.color = color
         self.image = pygame.Surface((self.width, self.height))
         self.image.fill(color)
         
@@ -57,7 +128,21 @@ class Vehicle(pygame.sprite.Sprite):
         # set the label for the vehicle
         self.label = label
         
-    def update(self, id_object, x, y, width, height, speed, dataConfidence, label=''):
+    def update(self, id_object, x, y, width, height, speed, dataConfidence, label='', color=None):
+        # Update in place, the surface is only re-created when the size changes
+        self.id = id_object
+        self.speed = speed
+        self.dataConfidence = dataConfidence
+        if label:
+            self.label = label
+        if width != self.width or height != self.height:
+            self.width = width
+            self.height = height
+            self.image = pygame.Surface((width, height))
+            self.image.fill(self.color)
+        if color is not None and color != self.color:
+            self.color = color
+            self.image.fill(color)
         self.rect = pygame.Rect(x, y, width, height)
         
 class EgoVehicle(Vehicle):
@@ -74,96 +159,143 @@ fov_angle = 90  # Field of view angle in degrees
 
 ########################################################################################
 def is_raspberrypi():
+    return get_platform_config().is_raspberrypi
+
+def _read_device_model():
     try:
         with io.open('/sys/firmware/devicetree/base/model', 'r') as m:
-            if 'raspberry pi' in m.read().lower(): return True
+            return m.read().strip('\x00 \n')
     except Exception: pass
-    return False
+    return ''
+
+def _read_thermal_file(path, sanity_check=True):
+    """Read a sysfs temperature in millidegrees Celsius"""
+    with io.open(path, 'r') as f:
+        temp_str = f.read().strip()
+    # Temperature is in millidegrees Celsius, convert to degrees
+    temp_celsius = float(temp_str) / 1000.0
+    # Sanity check: reasonable CPU temperature range
+    if sanity_check and not 0 <= temp_celsius <= 100:
+        return None
+    return temp_celsius
+
+def _read_sensors_command():
+    import subprocess
+    result = subprocess.run(['sensors', '-u'], capture_output=True, text=True, timeout=2)
+    if result.returncode == 0:
+        lines = result.stdout.split('\n')
+        for line in lines:
+            if 'temp1_input' in line or 'Core 0' in line:
+                parts = line.split(':')
+                if len(parts) > 1:
+                    temp_str = parts[1].strip()
+                    temp_celsius = float(temp_str)
+                    if 0 <= temp_celsius <= 100:
+                        return temp_celsius
+    return None
+
+def _read_windows_wmi():
+    import wmi
+    c = wmi.WMI(namespace="root\\wmi")
+    temperature_info = c.MSAcpi_ThermalZoneTemperature()
+    if temperature_info:
+        # Convert from tenths of Kelvin to Celsius
+        temp_kelvin = temperature_info[0].CurrentTemperature / 10.0
+        return temp_kelvin - 273.15
+    return None
+
+def _read_windows_powershell():
+    import subprocess
+    ps_cmd = 'Get-WmiObject -Namespace "root/wmi" -Class MSAcpi_ThermalZoneTemperature | Select-Object -First 1 -ExpandProperty CurrentTemperature'
+    result = subprocess.run(['powershell', '-Command', ps_cmd],
+                          capture_output=True, text=True, timeout=3)
+    if result.returncode == 0:
+        temp_raw = float(result.stdout.strip())
+        return (temp_raw / 10.0) - 273.15
+    return None
+
+def _simulated_temperature():
+    # Fallback: return simulated temperature for unsupported systems
+    import random
+    return 35.0 + random.uniform(-5.0, 10.0)  # Simulate 30-45°C range
+
+def get_temperature_sources(raspberrypi=None):
+    """Temperature readers to try in order on this platform, as (name, reader) pairs"""
+    if raspberrypi is None:
+        raspberrypi = is_raspberrypi()
+    if raspberrypi:
+        # Raspberry Pi temperature
+        return [('thermal_zone0', lambda: _read_thermal_file('/sys/class/thermal/thermal_zone0/temp', sanity_check=False))]
+
+    import platform
+    system = platform.system().lower()
+    sources = []
+    if system == 'linux':
+        # Ubuntu/Linux temperature from thermal zones
+        thermal_paths = [
+            '/sys/class/thermal/thermal_zone0/temp',
+            '/sys/class/thermal/thermal_zone1/temp',
+            '/sys/class/hwmon/hwmon0/temp1_input',
+            '/sys/class/hwmon/hwmon1/temp1_input'
+        ]
+        for path in thermal_paths:
+            sources.append((path, lambda path=path: _read_thermal_file(path)))
+        # Try sensors command as fallback
+        sources.append(('sensors', _read_sensors_command))
+    elif system == 'windows':
+        # Windows temperature using WMI, PowerShell as fallback
+        sources.append(('wmi', _read_windows_wmi))
+        sources.append(('powershell', _read_windows_powershell))
+    sources.append(('simulated', _simulated_temperature))
+    return sources
 
 def get_system_temperature():
     """Get system CPU temperature in Celsius for different platforms (RPi, Ubuntu/Linux, Windows)"""
-    try:
-        if is_raspberrypi():
-            # Raspberry Pi temperature
-            with io.open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-                temp_str = f.read().strip()
-                # Temperature is in millidegrees Celsius, convert to degrees
-                temp_celsius = float(temp_str) / 1000.0
-                return temp_celsius
-        else:
-            import platform
-            import os
-            import subprocess
-            
-            system = platform.system().lower()
-            
-            if system == 'linux':
-                # Ubuntu/Linux temperature from thermal zones
-                thermal_paths = [
-                    '/sys/class/thermal/thermal_zone0/temp',
-                    '/sys/class/thermal/thermal_zone1/temp',
-                    '/sys/class/hwmon/hwmon0/temp1_input',
-                    '/sys/class/hwmon/hwmon1/temp1_input'
-                ]
-                
-                for path in thermal_paths:
-                    try:
-                        if os.path.exists(path):
-                            with open(path, 'r') as f:
-                                temp_str = f.read().strip()
-                                # Most Linux thermal zones report in millidegrees
-                                temp_celsius = float(temp_str) / 1000.0
-                                # Sanity check: reasonable CPU temperature range
-                                if 0 <= temp_celsius <= 100:
-                                    return temp_celsius
-                    except:
-                        continue
-                
-                # Try sensors command as fallback
-                try:
-                    result = subprocess.run(['sensors', '-u'], capture_output=True, text=True, timeout=2)
-                    if result.returncode == 0:
-                        lines = result.stdout.split('\n')
-                        for line in lines:
-                            if 'temp1_input' in line or 'Core 0' in line:
-                                parts = line.split(':')
-                                if len(parts) > 1:
-                                    temp_str = parts[1].strip()
-                                    temp_celsius = float(temp_str)
-                                    if 0 <= temp_celsius <= 100:
-                                        return temp_celsius
-                except:
-                    pass
-                    
-            elif system == 'windows':
-                # Windows temperature using WMI
-                try:
-                    import wmi
-                    c = wmi.WMI(namespace="root\\wmi")
-                    temperature_info = c.MSAcpi_ThermalZoneTemperature()
-                    if temperature_info:
-                        # Convert from tenths of Kelvin to Celsius
-                        temp_kelvin = temperature_info[0].CurrentTemperature / 10.0
-                        temp_celsius = temp_kelvin - 273.15
-                        return temp_celsius
-                except ImportError:
-                    # Try PowerShell as fallback
-                    try:
-                        ps_cmd = 'Get-WmiObject -Namespace "root/wmi" -Class MSAcpi_ThermalZoneTemperature | Select-Object -First 1 -ExpandProperty CurrentTemperature'
-                        result = subprocess.run(['powershell', '-Command', ps_cmd], 
-                                              capture_output=True, text=True, timeout=3)
-                        if result.returncode == 0:
-                            temp_raw = float(result.stdout.strip())
-                            temp_celsius = (temp_raw / 10.0) - 273.15
-                            return temp_celsius
-                    except:
-                        pass
-                except:
-                    pass
-            
-            # Fallback: return simulated temperature for unsupported systems
-            import random
-            return 35.0 + random.uniform(-5.0, 10.0)  # Simulate 30-45°C range
-            
-    except Exception:
-        return None  # Return None if temperature cannot be read
\ No newline at end of file
+    for _, reader in get_temperature_sources():
+        try:
+            temp_celsius = reader()
+        except Exception:
+            continue
+        if temp_celsius is not None:
+            return temp_celsius
+    return None  # Return None if temperature cannot be read
+
+@dataclass(frozen=True)
+class PlatformConfig:
+    """Platform capabilities, probed once at startup by main()"""
+    rpi_model: str  # device tree model, empty when not a Raspberry Pi
+    is_raspberrypi: bool
+    has_socketcan: bool  # AF_CAN sockets and a can0 interface
+    video_driver: str  # SDL_VIDEODRIVER requested by the environment, empty for SDL default
+    thermal_source: str  # first temperature source that returned a value, empty for none
+
+def probe_platform():
+    model = _read_device_model()
+    raspberrypi = 'raspberry pi' in model.lower()
+
+    thermal_source = ''
+    for name, reader in get_temperature_sources(raspberrypi):
+        try:
+            if reader() is not None:
+                thermal_source = name
+                break
+        except Exception:
+            continue
+
+    return PlatformConfig(
+        rpi_model=model if raspberrypi else '',
+        is_raspberrypi=raspberrypi,
+        has_socketcan=hasattr(socket, 'AF_CAN') and os.path.exists('/sys/class/net/can0'),
+        video_driver=os.environ.get('SDL_VIDEODRIVER', ''),
+        thermal_source=thermal_source,
+    )
+
+# Probed by the first get_platform_config() call, main() makes that at startup
+_platform_config = None
+
+def get_platform_config():
+    """Everything else reads this instead of touching the filesystem"""
+    global _platform_config
+    if _platform_config is None:
+        _platform_config = probe_platform()
+    return _platform_config
@@ -1,28 +1,89 @@
 import math
+import numpy as np
 from pygame import Surface as draw_2D_Surface
 from pygame import display as pygame_display
 from pygame import event as pygame_event
 from pygame import draw as pygame_draw
-from pygame import font as pygame_font
-from pygame import QUIT, SRCALPHA
+from pygame import QUIT, SRCALPHA, Rect
 from pygame.sprite import Group
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
 from rx import radar_view, ObjectDrawData
 from defines import black, white, yellow, gray, red, green
 from defines import EgoVehicle, Vehicle
 from defines import fov_angle, ray_count, ray_color_hit, ray_color_no_hit
 from defines import INVALID_OBJECT_ID
-from rx import radar_view, ObjectDrawData, can_sniffer
-
-_cached_fonts = {}
-_ray_cache = {}
+from rx import radar_view, ObjectDrawData, RadarView, can_sniffer
+from text_cache import text_cache
+
+# Vehicle sprites by object id, updated in place instead of re-created every frame
+_vehicle_pool: Dict[int, Vehicle] = {}
+
+# Colour and label per radar object class
+VEHICLE_CLASS_STYLES = {
+    0: (yellow, "Unknown"),
+    1: (red, "Car"),
+    2: (green, "Bicycle"),
+}
+DEFAULT_VEHICLE_STYLE = (gray, "Pedestrian")
+# Ray geometry for the current (ego position, screen size, fov, ray count)
+_ray_cache: Dict[Tuple[int, ...], "RayGeometry"] = {}
+# Persistent ray overlay and the area drawn on it last frame
 _ray_surface = None
+_ray_area = None
 _cached_ray_angles = None
+_ray_directions_array = None
+
+
+class DirtyRectTracker:
+    """
+    Remembers where each item of the main screen was drawn and what it showed,
+    so only regions that changed since the last frame are pushed to the
+    display. Items are keyed by name (or id), the signature is whatever
+    identifies their content (text, colour, hit points, ...).
+    """
+
+    def __init__(self):
+        self.items: Dict[Hashable, Tuple[Rect, Hashable]] = {}
+        self.current: Dict[Hashable, Tuple[Rect, Hashable]] = {}
+        self.full_redraw = True
+
+    def invalidate(self) -> None:
+        """Push the whole screen on the next frame (screen switch, first frame)"""
+        self.full_redraw = True
+
+    def begin_frame(self) -> None:
+        self.current = {}
+
+    def mark(self, key: Hashable, rect: Rect, signature: Hashable = None) -> None:
+        self.current[key] = (Rect(rect), signature)
+
+    def end_frame(self) -> Optional[List[Rect]]:
+        """Regions to update, None when the whole screen has to be pushed"""
+        previous, self.items = self.items, self.current
+        self.current = {}
+        if self.full_redraw:
+            self.full_redraw = False
+            return None
+
+        dirty = []
+        for key, item in self.items.items():
+            old = previous.pop(key, None)
+            if old != item:
+                # moved or changed: uncover the old place, show the new one
+                dirty.append(item[0])
+                if old is not None:
+                    dirty.append(old[0])
+        # items that are gone leave a hole to clear
+        dirty.extend(old[0] for old in previous.values())
+        return dirty
+
+
+# Dirty regions of the main radar screen
+dirty_rects = DirtyRectTracker()
 
 
 def _get_font(size):
-    if size not in _cached_fonts:
-        _cached_fonts[size] = pygame_font.Font(pygame_font.get_default_font(), size)
-    return _cached_fonts[size]
+    return text_cache.get_font(size)
 
 
 def _calculate_ray_angles():
@@ -36,9 +97,59 @@ def _calculate_ray_angles():
     return _cached_ray_angles
 
 
+def _ray_directions() -> np.ndarray:
+    """Unit direction vectors (ray_count, 2) of the cached ray angles"""
+    global _ray_directions_array
+    if _ray_directions_array is None:
+        angles = np.array(_calculate_ray_angles())
+        _ray_directions_array = np.column_stack((np.cos(angles), np.sin(angles)))
+    return _ray_directions_array
+
+
+def cast_rays(
+    origin: Tuple[float, float],
+    directions: np.ndarray,
+    max_lengths: np.ndarray,
+    boxes: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Slab test of all rays against all boxes at once.
+    directions is (n, 2) unit vectors, boxes is (m, 4) as left, top, right,
+    bottom. Returns the distance to the nearest box along each ray
+    (max_lengths where nothing is hit) and the index of that box (-1 for none).
+    """
+    ray_total = len(directions)
+    if len(boxes) == 0:
+        return max_lengths.copy(), np.full(ray_total, -1)
+
+    ox, oy = origin
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # (n, 1) against (m,) broadcasts to (n, m)
+        inv_dx = 1.0 / directions[:, 0:1]
+        inv_dy = 1.0 / directions[:, 1:2]
+        tx1 = (boxes[:, 0] - ox) * inv_dx
+        tx2 = (boxes[:, 2] - ox) * inv_dx
+        ty1 = (boxes[:, 1] - oy) * inv_dy
+        ty2 = (boxes[:, 3] - oy) * inv_dy
+        t_near = np.maximum(np.minimum(tx1, tx2), np.minimum(ty1, ty2))
+        t_far = np.minimum(np.maximum(tx1, tx2), np.maximum(ty1, ty2))
+    # boxes behind the origin are not hit, a box around it is hit at 0
+    t_near = np.maximum(t_near, 0.0)
+    hits = (t_far >= t_near) & (t_near <= max_lengths[:, None])
+
+    t_hit = np.where(hits, t_near, np.inf)
+    nearest = t_hit.argmin(axis=1)
+    distances = t_hit[np.arange(ray_total), nearest]
+    is_hit = np.isfinite(distances)
+    return np.where(is_hit, distances, max_lengths), np.where(is_hit, nearest, -1)
+
+
 ########################################################################################
-def draw_update():
-    pygame_display.update()
+def draw_update(rects: Optional[List[Rect]] = None):
+    if rects is None:
+        pygame_display.update()
+    elif rects:
+        pygame_display.update(rects)
 
 
 ########################################################################################
@@ -67,68 +178,101 @@ def draw_environment(screen: draw_2D_Surface):
     #    pygame.draw.rect(screen, white, (center_lane + 45, y + lane_marker_move_y, marker_width, marker_height))
 
 
-########################################################################################
-# Function to calculate rays based on FOV
-def calculate_rays(screen: draw_2D_Surface, ego_vehicle: EgoVehicle):
-    rays = []
-    angles = _calculate_ray_angles()
+class RayGeometry(NamedTuple):
+    """Screen-clipped FOV rays from the ego vehicle"""
+
+    origin: Tuple[int, int]
+    directions: np.ndarray  # (ray_count, 2) unit vectors
+    max_lengths: np.ndarray  # distance to the screen edge per ray
+    rays: List[Tuple[Tuple[int, int], Tuple[float, float]]]  # (start, end) pairs
+
+
+def get_ray_geometry(screen: draw_2D_Surface, ego_vehicle: EgoVehicle) -> RayGeometry:
+    """Rays only change with the ego position or the screen, compute them once"""
     centerx = ego_vehicle.rect.centerx
     centery = ego_vehicle.rect.centery
     screen_w = screen.get_width()
     screen_h = screen.get_height()
+    key = (centerx, centery, screen_w, screen_h, fov_angle, ray_count)
+    geometry = _ray_cache.get(key)
+    if geometry is not None:
+        return geometry
+
+    directions = _ray_directions()
+    cos_a = directions[:, 0]
+    sin_a = directions[:, 1]
+    with np.errstate(divide="ignore"):
+        max_x = np.where(cos_a > 0, screen_w - centerx, -centerx)
+        max_y = np.where(sin_a > 0, screen_h - centery, -centery)
+        ray_length_x = np.where(cos_a != 0, max_x / cos_a, np.inf)
+        ray_length_y = np.where(sin_a != 0, max_y / sin_a, np.inf)
+    max_lengths = np.minimum(ray_length_x, ray_length_y)
+    ends = np.column_stack(
+        (centerx + max_lengths * cos_a, centery + max_lengths * sin_a)
+    )
+    origin = (centerx, centery)
+    rays = [(origin, (end_x, end_y)) for end_x, end_y in ends.tolist()]
 
-    for angle in angles:
-        cos_a = math.cos(angle)
-        sin_a = math.sin(angle)
-        if cos_a > 0:
-            max_x = screen_w - centerx
-        else:
-            max_x = -centerx
-        if sin_a > 0:
-            max_y = screen_h - centery
-        else:
-            max_y = -centery
-        ray_length_x = max_x / cos_a if cos_a != 0 else float("inf")
-        ray_length_y = max_y / sin_a if sin_a != 0 else float("inf")
-        ray_length = min(ray_length_x, ray_length_y)
-        end_x = centerx + ray_length * cos_a
-        end_y = centery + ray_length * sin_a
-        rays.append(((centerx, centery), (end_x, end_y)))
-
-    return rays
+    # Only the latest geometry is kept, the ego normally never moves
+    _ray_cache.clear()
+    geometry = _ray_cache[key] = RayGeometry(origin, directions, max_lengths, rays)
+    return geometry
 
 
 ########################################################################################
-def draw_rays(screen: draw_2D_Surface, ego_vehicle: EgoVehicle, vehicle_group: Group):
-    # Create a transparent surface for drawing rays
-    ray_surface = draw_2D_Surface(
-        screen.get_size(), SRCALPHA
-    )  # Use SRCALPHA for transparency
-
-    # Calculate and draw rays for the ego vehicle's field of view
-    rays = calculate_rays(screen, ego_vehicle)
-    # Check for collisions along each ray
-    for ray_start, ray_end in rays:
-        hit_point = None  # Initialize the hit point as None
-        for vehicle in vehicle_group:
-            if vehicle.rect.clipline(
-                ray_start, ray_end
-            ):  # Check if the ray intersects a vehicle
-                # Get the intersection point
-                hit_point = vehicle.rect.clipline(ray_start, ray_end)
-                break
-
-        # Draw the ray
-        if hit_point:
-            # Draw the ray only up to the collision point
-            pygame_draw.line(
-                ray_surface, ray_color_hit, ray_start, hit_point[0], 2
-            )  # Green ray for collision
-        else:
-            # Draw the full ray if no collision
-            pygame_draw.line(ray_surface, ray_color_no_hit, ray_start, ray_end, 2)
-    # Blit the transparent surface onto the main screen
-    screen.blit(ray_surface, (0, 0))
+# Function to calculate rays based on FOV
+def calculate_rays(screen: draw_2D_Surface, ego_vehicle: EgoVehicle):
+    return get_ray_geometry(screen, ego_vehicle).rays
+
+
+########################################################################################
+def draw_rays(
+    screen: draw_2D_Surface, ego_vehicle: EgoVehicle, vehicle_group: Group
+) -> np.ndarray:
+    """Draw the FOV rays up to the nearest vehicle, returns the distance along each ray"""
+    global _ray_surface, _ray_area
+    # One transparent overlay, only the part drawn last frame is cleared
+    if _ray_surface is None or _ray_surface.get_size() != screen.get_size():
+        _ray_surface = draw_2D_Surface(screen.get_size(), SRCALPHA)
+    elif _ray_area is not None:
+        _ray_surface.fill((0, 0, 0, 0), _ray_area)
+
+    # Rays of the ego vehicle's field of view
+    geometry = get_ray_geometry(screen, ego_vehicle)
+    origin = geometry.origin
+    directions = geometry.directions
+    # inclusive pixel bounds, the same as Rect.clipline
+    boxes = np.array(
+        [
+            (r.left, r.top, r.right - 1, r.bottom - 1)
+            for r in (v.rect for v in vehicle_group)
+        ],
+        dtype=float,
+    ).reshape(-1, 4)
+    # Nearest collision along every ray
+    distances, hit_index = cast_rays(origin, directions, geometry.max_lengths, boxes)
+    ray_ends = origin + directions * distances[:, None]
+
+    ray_area = None
+    for ray_end, hit in zip(ray_ends.tolist(), (hit_index >= 0).tolist()):
+        # Green ray up to the collision point, red full ray if no collision
+        line_rect = pygame_draw.line(
+            _ray_surface,
+            ray_color_hit if hit else ray_color_no_hit,
+            origin,
+            ray_end,
+            2,
+        )
+        ray_area = line_rect if ray_area is None else ray_area.union(line_rect)
+    _ray_area = ray_area
+    if ray_area is not None:
+        # Blit only the drawn part of the transparent overlay onto the main screen
+        screen.blit(_ray_surface, ray_area, ray_area)
+        # The overlay only changes when a ray hits something else
+        dirty_rects.mark(
+            "rays", ray_area, (tuple(origin), distances.round().astype(int).tobytes())
+        )
+    return distances
 
 
 ########################################################################################
@@ -141,71 +285,102 @@ def draw_own(screen: draw_2D_Surface, ego_vehicle: EgoVehicle, ego_group: Group)
         center=(ego_vehicle.rect.centerx, ego_vehicle.rect.top - 10)
     )
     screen.blit(text, text_rect)
+    dirty_rects.mark("ego", ego_vehicle.rect)
+    dirty_rects.mark("ego_label", text_rect, ego_vehicle.label)
 
 
 ########################################################################################
 def draw_vehicle(screen: draw_2D_Surface, veh: Vehicle):
     screen.blit(source=veh.image, dest=veh.rect)
     font = _get_font(14)
-    text = font.render(veh.label + " " + str(veh.dataConfidence), True, white)
+    label = veh.label + " " + str(veh.dataConfidence)
+    text = font.render(label, True, white)
     text_rect = text.get_rect(center=(veh.rect.centerx, veh.rect.top - 10))
     screen.blit(text, text_rect)
+    dirty_rects.mark(("vehicle_label", veh.id), text_rect, label)
     if veh.rect.top >= screen.get_height():
         veh.kill()
 
 
 ########################################################################################
+def draw_track_id(screen: draw_2D_Surface, veh: Vehicle, track_id: int):
+    # Own label below the vehicle: the text only changes with the track, so
+    # its cached surface is reused for the life of the track
+    font = _get_font(12)
+    label = f"#{track_id}"
+    text = font.render(label, True, white)
+    text_rect = text.get_rect(center=(veh.rect.centerx, veh.rect.bottom + 8))
+    screen.blit(text, text_rect)
+    dirty_rects.mark(("track_label", veh.id), text_rect, label)
 
 
-def update_vehicle(screen: draw_2D_Surface, vehicle_group: Group):
-    if radar_view.msg_counter > 0:
-        vehicle_map = {v.id: v for v in vehicle_group}
-        for object_entry in radar_view.object_list_for_draw:
+########################################################################################
+
+
+def update_vehicle(
+    screen: draw_2D_Surface,
+    vehicle_group: Group,
+    view: RadarView = radar_view,
+    positions: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    track_ids: Optional[np.ndarray] = None,
+):
+    # view is normally the renderer's snapshot of the last published scan,
+    # positions its (lat, lgt) per record predicted to the render instant,
+    # track_ids its persistent track id per record (-1 for none)
+    if view.publish_seq > 0:
+        if not _vehicle_pool:
+            # adopt the sprites pre-created by init_vehicles
+            _vehicle_pool.update((v.id, v) for v in vehicle_group)
+        if positions is None:
+            positions = (view.objects["lat_pos"], view.objects["lgt_pos"])
+        lat_positions, lgt_positions = positions
+        drawn = set()
+        for index, object_entry in enumerate(view.object_list_for_draw):
             if object_entry.object_id != INVALID_OBJECT_ID:
                 obj_id = object_entry.object_id
-                if obj_id in vehicle_map:
-                    veh = vehicle_map[obj_id]
-                    veh.kill()
-                veh = Vehicle(
-                    id_object=obj_id,
-                    color=(
-                        yellow
-                        if object_entry.class_type == 0
-                        else red
-                        if object_entry.class_type == 1
-                        else green
-                        if object_entry.class_type == 2
-                        else gray
-                    ),
-                    x=int(object_entry.lat_pos),
-                    y=int(object_entry.lgt_pos),
-                    width=int(object_entry.data_width),
-                    height=int(object_entry.data_len),
-                    speed=object_entry.lgt_velocity,
-                    dataConfidence=object_entry.data_conf,
-                    label=(
-                        "Unknown"
-                        if object_entry.class_type == 0
-                        else "Car"
-                        if object_entry.class_type == 1
-                        else "Bicycle"
-                        if object_entry.class_type == 2
-                        else "Pedestrian"
-                    ),
+                drawn.add(obj_id)
+                color, label = VEHICLE_CLASS_STYLES.get(
+                    object_entry.class_type, DEFAULT_VEHICLE_STYLE
                 )
-                veh.rect.y += veh.speed
+                width = int(object_entry.data_width)
+                height = int(object_entry.data_len)
+                speed = object_entry.lgt_velocity
+
+                veh = _vehicle_pool.get(obj_id)
+                if veh is None:
+                    veh = Vehicle(obj_id, color, 0, 0, width, height, speed, 0, label)
+                    _vehicle_pool[obj_id] = veh
+
+                # centred on the reported position, as Vehicle() places it.
+                # The speed is not added to y, the position is already the
+                # one at the render instant.
+                rect = Rect(0, 0, width, height)
+                rect.center = (int(lat_positions[index]), int(lgt_positions[index]))
                 veh.update(
-                    veh.id,
-                    veh.rect.x,
-                    veh.rect.y,
-                    veh.width,
-                    veh.height,
-                    veh.speed,
-                    veh.dataConfidence,
+                    obj_id,
+                    rect.x,
+                    rect.y,
+                    width,
+                    height,
+                    speed,
+                    object_entry.data_conf,
+                    label,
+                    color,
                 )
-                vehicle_group.add(veh)
+                if veh not in vehicle_group:
+                    vehicle_group.add(veh)
                 draw_vehicle(screen, veh)
+                if track_ids is not None and track_ids[index] >= 0:
+                    draw_track_id(screen, veh, int(track_ids[index]))
+        # sprites of slots without an object in this scan leave the group,
+        # they stay pooled and come back once their slot is valid again
+        for veh in vehicle_group.sprites():
+            if veh.id not in drawn:
+                vehicle_group.remove(veh)
     vehicle_group.draw(screen)
+    for veh in vehicle_group:
+        # the label carries the class and therefore the colour
+        dirty_rects.mark(("vehicle", veh.id), veh.rect, veh.label)
 
 
 def update_vehicle_ai(
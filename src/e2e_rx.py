@@ -0,0 +1,120 @@
+from binascii import crc_hqx
+from typing import Dict, List, Optional
+from defines import rx_e2e_max_delta_counter, rx_e2e_policy
+
+# Check result of one frame, also the index of its counter in E2EChannel.counts
+E2E_OK = 0
+E2E_CRC_FAIL = 1
+E2E_REPEATED = 2
+E2E_LOST = 3  # accepted, but frames were lost since the previous one
+E2E_WRONG_SEQUENCE = 4
+E2E_STATUS_NAMES = ("ok", "crc_fail", "repeated", "lost", "wrong_sequence")
+
+# Profile 5 header at the start of the frame: CRC (16 bit, little endian)
+# followed by the counter (8 bit)
+E2E_P05_HEADER = 3
+
+
+class E2EChannel:
+    """Counter state and check statistics of one protected CAN ID"""
+
+    __slots__ = ("data_id", "id_bytes", "last_counter", "counts", "lost_frames")
+
+    def __init__(self, data_id: int):
+        self.data_id = data_id
+        # appended to the CRC input, low byte first
+        self.id_bytes = bytes((data_id & 0xFF, data_id >> 8))
+        self.last_counter: Optional[int] = None
+        self.counts: List[int] = [0] * len(E2E_STATUS_NAMES)
+        self.lost_frames = 0
+
+
+class E2ERxVerifier:
+    """
+    Verifies AUTOSAR E2E profile 5 protection of received frames: the
+    CRC-16/CCITT-FALSE over the frame and the data id (binascii.crc_hqx,
+    table driven in C) and the continuity of the 8 bit counter.
+    Frames failing the check are dropped or only flagged, by policy.
+    """
+
+    def __init__(
+        self,
+        data_ids: Dict[int, int],
+        policy: str = rx_e2e_policy,
+        max_delta_counter: int = rx_e2e_max_delta_counter,
+    ):
+        if policy not in ("drop", "flag"):
+            raise ValueError(f"Unknown E2E policy {policy!r}")
+        self.channels: Dict[int, E2EChannel] = {
+            can_id: E2EChannel(data_id) for can_id, data_id in data_ids.items()
+        }
+        self.drop = policy == "drop"
+        self.max_delta_counter = max_delta_counter
+        self.dropped = 0
+
+    def check(self, can_id: int, data) -> int:
+        """Check one frame and update the counters of its CAN ID"""
+        channel = self.channels.get(can_id)
+        if channel is None:
+            return E2E_OK
+        # length convention of tx.py: the last two bytes are not protected
+        length = len(data) - 2
+        if length < E2E_P05_HEADER or crc_hqx(
+            channel.id_bytes, crc_hqx(data[2:length], 0xFFFF)
+        ) != (data[0] | data[1] << 8):
+            status = E2E_CRC_FAIL
+        else:
+            counter = data[2]
+            last = channel.last_counter
+            if last is None:
+                status = E2E_OK
+            else:
+                delta = (counter - last) & 0xFF
+                if delta == 1:
+                    status = E2E_OK
+                elif delta == 0:
+                    status = E2E_REPEATED
+                elif delta <= self.max_delta_counter:
+                    status = E2E_LOST
+                    channel.lost_frames += delta - 1
+                else:
+                    status = E2E_WRONG_SEQUENCE
+            if status != E2E_REPEATED:
+                # resynchronize on a wrong sequence like the AUTOSAR check
+                channel.last_counter = counter
+        channel.counts[status] += 1
+        return status
+
+    def accept(self, can_id: int, data) -> bool:
+        """Check one frame, False if it is to be dropped"""
+        status = self.check(can_id, data)
+        if status == E2E_OK or status == E2E_LOST or not self.drop:
+            return True
+        self.dropped += 1
+        return False
+
+    def stats(self) -> Dict[int, Dict[str, int]]:
+        """Check counters by CAN ID, lost_frames counts the missing frames"""
+        return {
+            can_id: {
+                **dict(zip(E2E_STATUS_NAMES, channel.counts)),
+                "lost_frames": channel.lost_frames,
+            }
+            for can_id, channel in self.channels.items()
+        }
+
+    def format_stats(self) -> str:
+        """One line per CAN ID that received frames"""
+        lines = [f"E2E RX ({'drop' if self.drop else 'flag'}), {self.dropped} dropped"]
+        for can_id, channel in self.channels.items():
+            if not any(channel.counts):
+                continue
+            counts = "  ".join(
+                f"{name}={count}"
+                for name, count in zip(E2E_STATUS_NAMES, channel.counts)
+            )
+            lines.append(
+                f"  0x{can_id:03X} (data id 0x{channel.data_id:03X}): {counts}"
+                f"  lost_frames={channel.lost_frames}"
+            )
+        return "\n".join(lines)
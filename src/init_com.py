@@ -13,6 +13,8 @@ def init_com():
         
         if(is_raspberrypi()):
             dbc_radar = cantools.db.load_file("database/radar.dbc")
+            if not get_platform_config().has_socketcan:
+                raise OSError('no socketcan can0 interface')
             print('Bring up CAN Tx....')
             os.system("sudo ifconfig can0 down")
             os.system("sudo ifconfig can1 down")
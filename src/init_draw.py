@@ -26,7 +26,7 @@ def init_draw():
         found = False
         for driver in drivers:
             # Make sure that SDL_VIDEODRIVER is set
-            if not os.getenv('SDL_VIDEODRIVER'):
+            if not get_platform_config().video_driver:
                 os.putenv('SDL_VIDEODRIVER', driver)
             try:
                 # Initialize the mixer
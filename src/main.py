@@ -4,16 +4,25 @@ from pygame import QUIT, KEYDOWN
 from init_com import init_com, deinit_com
 from init_draw import init_draw, deinit_draw
 from rx import (
+    RadarView,
     radar_view,
     ego_motion_data,
-    process_CAN0_rx,
-    process_CAN1_rx,
+    handle_CAN0_message,
+    handle_CAN1_message,
+    handle_CAN0_batch,
+    handle_CAN1_batch,
     radar_signal_status,
+    register_rx_filters,
+    CAN0_RX_IDS,
+    CAN1_RX_IDS,
+    rx_e2e,
 )
-from tx import periodic_CAN0_tx_TimeSync_125ms_wrapper, process_CAN0_tx_60ms_wrapper
+from rx_engine import RxEngine
+from tx import start_tx_scheduler
 from draw_3D import draw_3d_vehicle, draw_3d_road, draw_3d_rays
 from draw_2D import (
     draw_get_events,
+    dirty_rects,
     draw_own,
     draw_environment,
     draw_rays,
@@ -31,7 +40,12 @@ from menu import (
     draw_swipe_instructions,
     is_radar_status_screen_enabled,
     draw_radar_status_screen,
+    draw_profiler_overlay,
 )
+from profiler import profiler
+from motion import motion_predictor
+from tracker import object_tracker
+from can_log import CanLogRecorder, CanLogReplay
 from simulate import init_process_sim_radar, process_sim_car, process_sim_radar
 from defines import *
 
@@ -47,7 +61,10 @@ class VisualizationThread(threading.Thread):
         self.ego_vehicle = None
         self.running = True
         self.ego_motion_data = ego_motion_data
+        # Renderer-local copy of the last complete radar scan
+        self.radar_view = RadarView()
         self.frame_rate = fps  # Use fps from defines.py
+        self.current_screen = None
         self.initialization_complete = threading.Event()
 
     def update_ego_motion_data(self, new_data):
@@ -80,11 +97,13 @@ class VisualizationThread(threading.Thread):
 
         while self.running:
             try:
-                # Get all events for this frame
-                events = draw_get_events()
+                frame_start = time.perf_counter()
+                with profiler.stage("events"):
+                    # Get all events for this frame
+                    events = draw_get_events()
 
-                # Handle swipe gestures first
-                handle_swipe_events(events)
+                    # Handle swipe gestures first
+                    handle_swipe_events(events)
 
                 # Check for quit events
                 for event in events:
@@ -103,9 +122,22 @@ class VisualizationThread(threading.Thread):
                     break
 
                 # Check which screen to display
+                if is_can_screen_enabled[0]:
+                    screen_name = "can"
+                elif is_radar_status_screen_enabled[0]:
+                    screen_name = "radar_status"
+                else:
+                    screen_name = "main"
+                if screen_name != self.current_screen:
+                    # Everything changes on a screen switch
+                    dirty_rects.invalidate()
+                    self.current_screen = screen_name
+
+                update_rects = None
                 if is_can_screen_enabled[0]:
                     # Draw CAN data screen
-                    draw_can_data_screen(self.screen)
+                    with profiler.stage("can_screen"):
+                        draw_can_data_screen(self.screen)
 
                     # Draw exit button only on CAN screen
                     draw_exit_button(
@@ -118,9 +150,13 @@ class VisualizationThread(threading.Thread):
                         self._exit_callback,
                         events,
                     )
+                    draw_profiler_overlay(self.screen)
                 elif is_radar_status_screen_enabled[0]:
                     # Draw radar status screen
-                    draw_radar_status_screen(self.screen, radar_signal_status, events)
+                    with profiler.stage("status_screen"):
+                        draw_radar_status_screen(
+                            self.screen, radar_signal_status, events
+                        )
 
                     # Draw exit button only on radar status screen
                     draw_exit_button(
@@ -133,17 +169,36 @@ class VisualizationThread(threading.Thread):
                         self._exit_callback,
                         events,
                     )
+                    draw_profiler_overlay(self.screen)
                 else:
+                    # The whole frame is composed, only changed regions are pushed
+                    dirty_rects.begin_frame()
+
                     # Fill the screen with a color
-                    draw_environment(self.screen)
+                    with profiler.stage("environment"):
+                        draw_environment(self.screen)
 
                     # Draw own vehicle
-                    draw_own(self.screen, self.ego_vehicle, self.ego_group)
-                    # Update data for all vehicles
-                    update_vehicle(self.screen, self.vehicle_group)
+                    with profiler.stage("own"):
+                        draw_own(self.screen, self.ego_vehicle, self.ego_group)
+                    # Update data for all vehicles from the latest complete scan
+                    with profiler.stage("read_scan"):
+                        radar_view.read_published(self.radar_view)
+                    # Move the objects of the scan to where they are by now
+                    with profiler.stage("predict"):
+                        positions = motion_predictor.predict(self.radar_view)
+                    with profiler.stage("vehicles"):
+                        update_vehicle(
+                            self.screen,
+                            self.vehicle_group,
+                            self.radar_view,
+                            positions,
+                            object_tracker.track_ids(self.radar_view.publish_seq),
+                        )
                     # Use the menu state
                     if is_rays_enabled[0]:
-                        draw_rays(self.screen, self.ego_vehicle, self.vehicle_group)
+                        with profiler.stage("rays"):
+                            draw_rays(self.screen, self.ego_vehicle, self.vehicle_group)
 
                     # Draw the exit button (top-right corner, 100x40 size)
                     draw_exit_button(
@@ -157,21 +212,31 @@ class VisualizationThread(threading.Thread):
                         events,
                     )
 
-                    # Draw vehicle and radar info
-                    draw_extraInfo(
-                        self.screen,
-                        self.ego_motion_data,
-                        self.vehicle_group,
-                        radar_view.scan_id,
-                    )
-
-                    # Draw swipe instructions
-                    draw_swipe_instructions(
-                        self.screen, is_can_screen=False, is_radar_status_screen=False
-                    )
+                    with profiler.stage("info"):
+                        # Draw vehicle and radar info
+                        draw_extraInfo(
+                            self.screen,
+                            self.ego_motion_data,
+                            self.vehicle_group,
+                            self.radar_view.scan_id,
+                        )
+
+                        # Draw swipe instructions
+                        draw_swipe_instructions(
+                            self.screen,
+                            is_can_screen=False,
+                            is_radar_status_screen=False,
+                        )
+                        draw_profiler_overlay(self.screen)
+                    update_rects = dirty_rects.end_frame()
 
                 # Update the display
-                draw_update()
+                with profiler.stage("display_update"):
+                    draw_update(update_rects)
+                if profiler.enabled:
+                    # Work time of the frame, without the frame rate wait below
+                    profiler.stage("frame").add(time.perf_counter() - frame_start)
+                    profiler.tick()
 
                 # Control frame rate
                 if clock:
@@ -197,16 +262,57 @@ class VisualizationThread(threading.Thread):
         self.running = False
 
 
+def profile_rx(name, handler):
+    """Time an RX handler as a profiler stage, the handler itself when disabled"""
+    if not profiler.enabled:
+        return handler
+    timer = profiler.stage(name)
+
+    def timed_handler(msg):
+        with timer:
+            handler(msg)
+
+    return timed_handler
+
+
+def replay_can_log(path, speed, handlers, stop_event):
+    """Feed a recorded CAN log to the RX handlers, reports the throughput"""
+    try:
+        log = CanLogReplay(path)
+    except (OSError, ValueError) as e:
+        print(f"CAN log replay failed: {e}")
+        return
+    print(f"CAN log replay: {len(log)} frames, {log.duration():.1f} s recorded")
+    try:
+        frames, elapsed = log.replay(handlers, speed, stop_event)
+    finally:
+        log.close()
+    rate = frames / elapsed if elapsed > 0 else 0.0
+    print(f"CAN log replay: {frames} frames in {elapsed:.2f} s ({rate:.0f} frames/s)")
+
+
 def main():
     """Optimized main function with improved data type handling and threaded visualization"""
     try:
         EgoMotion_data_main = ego_motion_data
 
+        # Probe the platform once, before any thread asks for it
+        platform_config = get_platform_config()
+        print(
+            f"Platform: {platform_config.rpi_model or 'not a Raspberry Pi'}, "
+            f"socketcan {'yes' if platform_config.has_socketcan else 'no'}, "
+            f"temperature from {platform_config.thermal_source or 'nowhere'}"
+        )
+
         # Initialize the CAN communication
         main_can_bus_CAN0, main_can_bus_CAN1, main_radar_dbc = init_com()
 
-        # Set display flags based on platform
-        if not is_raspberrypi():
+        # Follow the objects across scans with persistent ids, once per scan
+        object_tracker.attach(radar_view)
+
+        # Off the Pi a recorded CAN log replaces the simulator when configured
+        replay_log = not is_raspberrypi() and bool(can_log_replay_path)
+        if not is_raspberrypi() and not replay_log:
             init_process_sim_radar()
 
         # Create and start visualization thread
@@ -225,27 +331,69 @@ def main():
 
         print("Visualization thread initialized successfully")
 
-        # Create stop events for threads
-        stop_event_periodic_CAN0_tx_60ms = threading.Event()
-        stop_event_periodic_CAN0_tx_TimeSync_125ms = threading.Event()
-
-        # Start TX thread with wrapper function using existing CAN bus
-        periodic_CAN0_tx_60ms_thread = threading.Thread(
-            target=process_CAN0_tx_60ms_wrapper,
-            args=(60, stop_event_periodic_CAN0_tx_60ms, main_can_bus_CAN0),
-        )
-        periodic_CAN0_tx_60ms_thread.daemon = True
-        periodic_CAN0_tx_60ms_thread.start()
-        print("TX thread started - sending CAN messages every 60ms")
-
-        # Start 125ms periodic thread
-        periodic_CAN0_tx_TimeSync_125ms_thread = threading.Thread(
-            target=periodic_CAN0_tx_TimeSync_125ms_wrapper,
-            args=(125, stop_event_periodic_CAN0_tx_TimeSync_125ms, main_can_bus_CAN1),
-        )
-        periodic_CAN0_tx_TimeSync_125ms_thread.daemon = True
-        periodic_CAN0_tx_TimeSync_125ms_thread.start()
-        print("125ms periodic thread started")
+        # One TX thread sends every cyclic message against absolute deadlines
+        tx_scheduler = start_tx_scheduler(main_can_bus_CAN0, main_can_bus_CAN1)
+        print("TX scheduler started - CAN messages every 60ms and 125ms")
+
+        # RX handlers per bus index (0: radar CAN0, 1: vehicle CAN1)
+        rx_handlers = [
+            profile_rx("rx_CAN0", lambda msg: handle_CAN0_message(main_radar_dbc, msg)),
+            profile_rx(
+                "rx_CAN1",
+                lambda msg: viz_thread.update_ego_motion_data(handle_CAN1_message(msg)),
+            ),
+        ]
+        # The same per batch read, used by the batch reader (rx_batch_read)
+        rx_batch_handlers = [
+            profile_rx(
+                "rx_CAN0", lambda frames: handle_CAN0_batch(main_radar_dbc, frames)
+            ),
+            profile_rx(
+                "rx_CAN1",
+                lambda frames: viz_thread.update_ego_motion_data(
+                    handle_CAN1_batch(frames)
+                ),
+            ),
+        ]
+
+        # Event-driven reception: each bus is drained on its own threads
+        rx_engine = RxEngine()
+        can_log_recorder = None
+        stop_event_replay = threading.Event()
+        if is_raspberrypi():
+            if can_log_record_path:
+                # Record the raw frames of both buses for replay off the Pi
+                can_log_recorder = CanLogRecorder(can_log_record_path)
+                rx_handlers = [
+                    can_log_recorder.tap(bus_index, handler)
+                    for bus_index, handler in enumerate(rx_handlers)
+                ]
+                rx_batch_handlers = [
+                    can_log_recorder.tap_batch(bus_index, handler)
+                    for bus_index, handler in enumerate(rx_batch_handlers)
+                ]
+            # Let the kernel drop frames nobody decodes
+            register_rx_filters(main_can_bus_CAN1, CAN1_RX_IDS)
+            register_rx_filters(main_can_bus_CAN0, CAN0_RX_IDS)
+            rx_engine.add_bus(
+                "CAN1", main_can_bus_CAN1, rx_handlers[1], rx_batch_handlers[1]
+            )
+            rx_engine.add_bus(
+                "CAN0", main_can_bus_CAN0, rx_handlers[0], rx_batch_handlers[0]
+            )
+            rx_engine.start()
+        elif replay_log:
+            replay_thread = threading.Thread(
+                target=replay_can_log,
+                args=(
+                    can_log_replay_path,
+                    can_log_replay_speed,
+                    rx_handlers,
+                    stop_event_replay,
+                ),
+                daemon=True,
+            )
+            replay_thread.start()
 
         # Main CAN processing loop
         running = True
@@ -257,38 +405,38 @@ def main():
                 break
 
             # Set display flags based on platform
-            if is_raspberrypi():
-                ##### CAN1 - Car #####
-                # Process the RX data
-                EgoMotion_data_main = process_CAN1_rx(main_can_bus_CAN1)
-                # Process the TX data
-                # not required as no data to send
-                # process_CAN1_tx(main_can_bus_CAN1)
-
-                ##### CAN0 - Radar #####
-                # TX is now handled by separate process - removed from main loop
-                # Process the RX data
-                process_CAN0_rx(main_radar_dbc, main_can_bus_CAN0)
-
-                # Update visualization thread with new ego motion data
-                viz_thread.update_ego_motion_data(EgoMotion_data_main)
+            if is_raspberrypi() or replay_log:
+                # CAN0/CAN1 RX runs on the RX engine (or replay) threads and TX
+                # on its own threads, only wait here for the visualization
+                # thread to exit
+                viz_thread.join(timeout=0.1)
             else:
                 # simulate object list
-                process_sim_radar(main_radar_dbc, main_can_bus_CAN0, main_can_bus_CAN1)
-                EgoMotion_data_main = process_sim_car(main_can_bus_CAN1)
+                with profiler.stage("sim_radar"):
+                    process_sim_radar(
+                        main_radar_dbc, main_can_bus_CAN0, main_can_bus_CAN1
+                    )
+                with profiler.stage("sim_car"):
+                    EgoMotion_data_main = process_sim_car(main_can_bus_CAN1)
 
                 # Update visualization thread with new ego motion data
                 viz_thread.update_ego_motion_data(EgoMotion_data_main)
 
-            time.sleep(0.0005)
+                time.sleep(0.0005)
 
         # Clean shutdown
         print("Shutting down...")
+        rx_engine.stop()
+        stop_event_replay.set()
+        if can_log_recorder is not None:
+            can_log_recorder.close()
         viz_thread.stop()
-        stop_event_periodic_CAN0_tx_60ms.set()
-        stop_event_periodic_CAN0_tx_TimeSync_125ms.set()
-        periodic_CAN0_tx_60ms_thread.join()
-        periodic_CAN0_tx_TimeSync_125ms_thread.join()
+        tx_scheduler.stop()
+        print(tx_scheduler.format_metrics())
+        print(rx_engine.format_dropped())
+        if rx_e2e is not None:
+            print(rx_e2e.format_stats())
+        print(object_tracker.format_stats())
 
         # Wait for visualization thread to finish
         if viz_thread.is_alive():
@@ -297,15 +445,16 @@ def main():
         print("Interrupted by user")
         # Clean shutdown on interrupt
         try:
+            rx_engine.stop()
+            stop_event_replay.set()
+            if can_log_recorder is not None:
+                can_log_recorder.close()
             viz_thread.stop()
             if viz_thread.is_alive():
                 viz_thread.join(timeout=1.0)
         except:
             pass
-        stop_event_periodic_CAN0_tx_60ms.set()
-        stop_event_periodic_CAN0_tx_TimeSync_125ms.set()
-        periodic_CAN0_tx_60ms_thread.join()
-        periodic_CAN0_tx_TimeSync_125ms_thread.join()
+        tx_scheduler.stop()
         deinit_com()
 
 
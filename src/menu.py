@@ -1,25 +1,24 @@
 from pygame import draw as menu_draw
-from pygame import font as menu_font
 from pygame import mouse as menu_mouse
 from pygame import event as menu_event
 from pygame import MOUSEBUTTONDOWN
 from pygame import Surface as menu_Surface
-from defines import white, gray, green, black, get_system_temperature
+from pygame import Rect as menu_Rect
+from defines import white, gray, green, black
 from rx import toggle_can_sniffer, can_sniffer, radar_signal_status
+from temperature import temperature_sampler
 from swipe_detector import swipe_detector
-
-_menu_font_cache = {}
-
+from draw_2D import dirty_rects
+from text_cache import text_cache
+from profiler import profiler
 
 def _menu_get_font(size):
-    if size not in _menu_font_cache:
-        _menu_font_cache[size] = menu_font.Font(menu_font.get_default_font(), size)
-    return _menu_font_cache[size]
+    return text_cache.get_font(size)
 
 
 def draw_temperature(screen: menu_Surface, font_size=16):
     """Draw raspberry pi temperature at consistent location (left bottom corner)"""
-    temp = get_system_temperature()
+    temp = temperature_sampler.read()
     if temp is not None:
         if temp < 60:
             temp_color = green
@@ -29,10 +28,12 @@ def draw_temperature(screen: menu_Surface, font_size=16):
             temp_color = (255, 0, 0)
 
         font = _menu_get_font(font_size)
-        temp_text = font.render(f"CPU: {temp:.1f}°C", True, temp_color)
+        label = f"CPU: {temp:.1f}°C"
+        temp_text = font.render(label, True, temp_color)
         temp_rect = temp_text.get_rect()
         temp_rect.bottomleft = (10, screen.get_height() - 10)
         screen.blit(temp_text, temp_rect)
+        dirty_rects.mark("temperature", temp_rect, label)
 
 
 # Checkbox state
@@ -48,6 +49,10 @@ previous_screen = ["main"]  # Track previous screen: 'main' or 'can'
 is_can_screen_paused = [False]  # Toggle between paused and live mode
 paused_messages = []  # Store messages when paused
 
+# Rendered CAN monitor rows by sniffer sequence number:
+# [timestamp text, timestamp surface, id surface, dlc surface, data surface]
+_can_row_cache = {}
+
 # Timestamp optimization variables
 base_timestamp = None
 last_timestamp_display = ""
@@ -86,9 +91,7 @@ def toggle_can_screen_pause():
 
     if is_can_screen_paused[0]:
         # When pausing, capture current messages
-        paused_messages = (
-            can_sniffer.messages.copy() if hasattr(can_sniffer, "messages") else []
-        )
+        paused_messages = can_sniffer.records()
     else:
         # When unpausing, clear paused messages to show live data
         paused_messages = []
@@ -103,7 +106,7 @@ def handle_swipe_events(events):
     - Radar status: DOWN → Previous screen (Main or CAN)
     Returns True if a swipe was detected and handled
     """
-    from pygame import KEYDOWN, K_SPACE
+    from pygame import KEYDOWN, K_SPACE, K_p
 
     for event in events:
         # Handle swipe gestures
@@ -151,6 +154,10 @@ def handle_swipe_events(events):
                 # Spacebar: toggle pause when on CAN screen
                 toggle_can_screen_pause()
                 return True
+            elif event.key == K_p:
+                # P: show/hide the frame profiler overlay
+                profiler.toggle_overlay()
+                return True
     return False
 
 
@@ -177,7 +184,7 @@ def draw_simple_checkbox(
         )
 
     # Render the label text next to the checkbox
-    font = menu_font.Font(menu_font.get_default_font(), 20)
+    font = _menu_get_font(20)
     text_surface = font.render(label, True, color)
     text_rect = text_surface.get_rect(midleft=(x + size + 10, y + size // 2))
     screen.blit(text_surface, text_rect)
@@ -185,19 +192,19 @@ def draw_simple_checkbox(
 
 def draw_extraInfo(screen: menu_Surface, EgoMotion_data_local, vehicle_group, scanID):
     font = _menu_get_font(16)
-    text = font.render("Speed: " + str(EgoMotion_data_local.speed), True, white)
+    label = "Speed: " + str(EgoMotion_data_local.speed)
+    text = font.render(label, True, white)
     text_rect = text.get_rect()
     text_rect.center = (50, screen.get_height() - 60)
     screen.blit(text, text_rect)
+    dirty_rects.mark("speed_info", text_rect, label)
 
-    text = font.render(
-        "Nb of objects: " + str(len(vehicle_group)) + " ScanID: " + str(scanID),
-        True,
-        white,
-    )
+    label = "Nb of objects: " + str(len(vehicle_group)) + " ScanID: " + str(scanID)
+    text = font.render(label, True, white)
     text_rect = text.get_rect()
     text_rect.center = (110, screen.get_height() - 40)
     screen.blit(text, text_rect)
+    dirty_rects.mark("object_info", text_rect, label)
 
     draw_temperature(screen, font_size=16)
 
@@ -220,6 +227,7 @@ def draw_exit_button(
     text_surface = font.render(label, True, (0, 0, 0))
     text_rect = text_surface.get_rect(center=(x + width // 2, y + height // 2))
     screen.blit(text_surface, text_rect)
+    dirty_rects.mark("exit_button", rect, (label, color))
 
     # Handle click event
     for event in events:
@@ -286,7 +294,7 @@ def draw_swipe_instructions(
     screen: menu_Surface, is_can_screen=False, is_radar_status_screen=False
 ):
     """Draw swipe instructions at the bottom of the screen"""
-    instruction_font = menu_font.Font(menu_font.get_default_font(), 14)
+    instruction_font = _menu_get_font(14)
 
     if is_can_screen:
         instruction_text = "→ Swipe right to main | ↑ Swipe up for radar status"
@@ -301,6 +309,50 @@ def draw_swipe_instructions(
         center=(screen.get_width() // 2, screen.get_height() - 30)
     )
     screen.blit(text_surface, text_rect)
+    dirty_rects.mark("swipe_instructions", text_rect, instruction_text)
+
+
+def draw_profiler_overlay(screen: menu_Surface, font_size=14):
+    """Draw the per-stage frame timings (top left corner)"""
+    if not profiler.overlay_enabled:
+        return
+
+    # Percentiles are recomputed twice a second, that is plenty to read them
+    rows = [("stage", "p50", "p95", "p99 ms")] + [
+        (name, f"{p50:.2f}", f"{p95:.2f}", f"{p99:.2f}")
+        for name, p50, p95, p99, _ in profiler.summary(max_age=0.5)
+    ]
+    font = _menu_get_font(font_size)
+    line_height = font.get_linesize()
+    name_width = max(font.size(row[0])[0] for row in rows) + 10
+    value_width = font.size("000.00 ms")[0]
+    rect = menu_Rect(
+        10, 60, name_width + 3 * value_width + 8, line_height * len(rows) + 8
+    )
+
+    menu_draw.rect(screen, black, rect)
+    for i, row in enumerate(rows):
+        y = rect.y + 4 + i * line_height
+        screen.blit(font.render(row[0], True, white), (rect.x + 4, y))
+        for column, value in enumerate(row[1:], start=1):
+            # numbers are right aligned in their column
+            text = font.render(value, True, white)
+            right = rect.x + 4 + name_width + column * value_width
+            screen.blit(text, (right - text.get_width(), y))
+    dirty_rects.mark("profiler", rect, tuple(rows))
+
+
+def _render_can_row(font, record) -> list:
+    """Render the columns of a sniffer record that never change"""
+    data_hex = record.data.hex().upper() if record.data else "00"
+    return [
+        None,
+        None,
+        font.render(f"0x{record.arbitration_id:03X}", True, white),
+        font.render(str(record.dlc), True, white),
+        # payloads are mostly unique, the row cache keeps them instead
+        font.render_uncached(data_hex, True, white),
+    ]
 
 
 def draw_can_data_screen(screen: menu_Surface):
@@ -309,7 +361,7 @@ def draw_can_data_screen(screen: menu_Surface):
     screen.fill(black)
 
     # Draw title with pause indication
-    title_font = menu_font.Font(menu_font.get_default_font(), 24)
+    title_font = _menu_get_font(24)
     if is_can_screen_paused[0]:
         title_text = title_font.render(
             "CAN Message Monitor - PAUSED", True, (255, 255, 0)
@@ -321,7 +373,7 @@ def draw_can_data_screen(screen: menu_Surface):
     screen.blit(title_text, (20, 20))
 
     # Draw column headers
-    header_font = menu_font.Font(menu_font.get_default_font(), 18)
+    header_font = _menu_get_font(18)
     header_y = 60
     screen.blit(header_font.render("Time", True, white), (20, header_y))
     screen.blit(header_font.render("CAN ID", True, white), (120, header_y))
@@ -334,47 +386,43 @@ def draw_can_data_screen(screen: menu_Surface):
     )
 
     # Draw CAN messages
-    data_font = menu_font.Font(menu_font.get_default_font(), 14)
+    data_font = _menu_get_font(14)
     start_y = header_y + 40
     line_height = 20
 
     # Use paused messages if in pause mode, otherwise use live messages
+    max_rows = (screen.get_height() - start_y - 100) // line_height
     messages_to_display = (
-        paused_messages if is_can_screen_paused[0] else can_sniffer.messages
-    )
-    max_messages = min(
-        len(messages_to_display), (screen.get_height() - start_y - 100) // line_height
+        paused_messages if is_can_screen_paused[0] else can_sniffer.records(max_rows)
     )
+    max_messages = min(len(messages_to_display), max_rows)
 
-    global base_timestamp, last_timestamp_display
+    global _can_row_cache
 
-    for i, message in enumerate(messages_to_display[:max_messages]):
+    visible_rows = {}
+    for i, record in enumerate(messages_to_display[:max_messages]):
         y_pos = start_y + (i * line_height)
 
-        # Parse message string to extract components
-        try:
-            # Expected format: "ID: 0x123 | Time: 123.456 | Data: AABBCC"
-            parts = message.split(" | ")
-            timestamp = parts[0].replace("Time: ", "")
-            can_id = parts[1].replace("ID: ", "")
-            can_dlc = parts[2].replace("DLC: ", "")
-            data_part = parts[3].replace("Data: ", "")
+        # Optimize timestamp display - show only changing parts
+        timestamp_display = optimize_timestamp_display(record.timestamp, i == 0)
 
-            # Calculate DLC from data length
-            dlc = len(data_part) // 2 if data_part != "00" else 0
+        row = _can_row_cache.get(record.sequence)
+        if row is None:
+            row = _render_can_row(data_font, record)
+        if row[0] != timestamp_display:
+            # Only the timestamp changes once a row scrolls down
+            row[0] = timestamp_display
+            row[1] = data_font.render_uncached(timestamp_display, True, white)
+        visible_rows[record.sequence] = row
 
-            # Optimize timestamp display - show only changing parts
-            timestamp_display = optimize_timestamp_display(timestamp, i == 0)
+        # Draw the data with optimized timestamp first
+        screen.blit(row[1], (20, y_pos))
+        screen.blit(row[2], (120, y_pos))
+        screen.blit(row[3], (220, y_pos))
+        screen.blit(row[4], (280, y_pos))
 
-            # Draw the data with optimized timestamp first
-            screen.blit(data_font.render(timestamp_display, True, white), (20, y_pos))
-            screen.blit(data_font.render(can_id, True, white), (120, y_pos))
-            screen.blit(data_font.render(str(dlc), True, white), (220, y_pos))
-            screen.blit(data_font.render(data_part, True, white), (280, y_pos))
-
-        except (IndexError, ValueError):
-            # If parsing fails, just show the raw message
-            screen.blit(data_font.render(message[:80], True, white), (20, y_pos))
+    # Rows that scrolled off screen are dropped
+    _can_row_cache = visible_rows
 
     # Draw status info with pause indication
     status_y = screen.get_height() - 80
@@ -386,9 +434,7 @@ def draw_can_data_screen(screen: menu_Surface):
         screen.blit(data_font.render(pause_status, True, pause_color), (20, status_y))
         status_text = f"Showing {len(paused_messages)} paused messages"
     else:
-        status_text = (
-            f"Live: {len(can_sniffer.messages)} messages - Press SPACE to pause"
-        )
+        status_text = f"Live: {len(can_sniffer)} messages - Press SPACE to pause"
 
     screen.blit(data_font.render(status_text, True, white), (20, status_y + 20))
 
@@ -401,17 +447,15 @@ def draw_can_data_screen(screen: menu_Surface):
 
 def draw_radar_status_screen(screen, radar_signal_status, events):
     """Draw comprehensive radar status information from FlrFlr1canFr96 dataclass optimized for 800x480"""
-    from defines import get_system_temperature
-    import pygame
-
     # Clear screen
     screen.fill((0, 0, 0))
 
     # Set up fonts - smaller for 800x480
-    title_font = pygame.font.Font(None, 28)
-    header_font = pygame.font.Font(None, 24)
-    data_font = pygame.font.Font(None, 20)
-    small_font = pygame.font.Font(None, 20)
+    # (Font(None, n) is the default font at int(n * 0.6875): 28, 24, 20)
+    title_font = _menu_get_font(19)
+    header_font = _menu_get_font(16)
+    data_font = _menu_get_font(13)
+    small_font = _menu_get_font(13)
 
     # Colors
     white = (255, 255, 255)
@@ -0,0 +1,64 @@
+import time
+import numpy as np
+from typing import Optional, Tuple
+from rx import RadarView
+from defines import (
+    motion_prediction_enabled,
+    motion_prediction_max_dt,
+    motion_prediction_scale,
+)
+
+
+class MotionPredictor:
+    """
+    Extrapolates the objects of the last radar scan to the render instant
+    with their velocity and acceleration, so they move smoothly between scans
+    instead of jumping when the next scan arrives. The extrapolation is capped
+    at max_dt, objects of a stalled radar stop instead of drifting away.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = motion_prediction_enabled,
+        scale: float = motion_prediction_scale,
+        max_dt: float = motion_prediction_max_dt,
+    ):
+        self.enabled = enabled
+        self.scale = scale
+        self.max_dt = max_dt
+        # Predicted (lat, lgt) per record, reused every frame
+        self.lat_pos = np.zeros(0)
+        self.lgt_pos = np.zeros(0)
+
+    def prediction_time(self, view: RadarView, now: float) -> float:
+        """Seconds to extrapolate the scan of view by"""
+        if not self.enabled or view.scan_time == 0.0:
+            return 0.0
+        return min(max(now - view.scan_time, 0.0), self.max_dt)
+
+    def predict(
+        self, view: RadarView, now: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Predicted lat/lgt positions of every record of view at now (monotonic)"""
+        records = view.objects
+        if self.lat_pos.shape != records.shape:
+            self.lat_pos = np.zeros(records.shape)
+            self.lgt_pos = np.zeros(records.shape)
+        if now is None:
+            now = time.monotonic()
+        dt = self.prediction_time(view, now)
+
+        # pos + scale * (v * dt + a * dt^2 / 2), evaluated in place
+        for out, pos, vel, acc in (
+            (self.lat_pos, "lat_pos", "lat_velocity", "lat_acc"),
+            (self.lgt_pos, "lgt_pos", "lgt_velocity", "lgt_acc"),
+        ):
+            np.multiply(records[acc], 0.5 * dt, out=out)
+            out += records[vel]
+            out *= self.scale * dt
+            out += records[pos]
+        return self.lat_pos, self.lgt_pos
+
+
+# Used by the visualization thread only
+motion_predictor = MotionPredictor()
@@ -0,0 +1,145 @@
+import csv
+import os
+import time
+import numpy as np
+from typing import Dict, List, Tuple
+from defines import (
+    profiler_csv_path,
+    profiler_dump_interval,
+    profiler_enabled,
+    profiler_window,
+)
+
+
+class _NullStage:
+    """Returned for every stage while profiling is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class StageTimer:
+    """Times one stage, keeping its last `window` durations in a ring"""
+
+    __slots__ = ("samples", "count", "_start")
+
+    def __init__(self, window: int):
+        self.samples = np.zeros(window)
+        self.count = 0
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.add(time.perf_counter() - self._start)
+        return False
+
+    def add(self, duration: float) -> None:
+        self.samples[self.count % len(self.samples)] = duration
+        self.count += 1
+
+    def percentiles(self) -> Tuple[float, float, float]:
+        """p50, p95, p99 of the window in milliseconds"""
+        filled = min(self.count, len(self.samples))
+        if filled == 0:
+            return 0.0, 0.0, 0.0
+        p50, p95, p99 = np.percentile(self.samples[:filled], (50, 95, 99)) * 1000.0
+        return float(p50), float(p95), float(p99)
+
+
+class FrameProfiler:
+    """
+    Rolling per-stage timings of the render and CAN loops. Each stage is
+    timed with `with profiler.stage("name"):`, which costs one dict lookup
+    while profiling is disabled.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = profiler_enabled,
+        window: int = profiler_window,
+        dump_interval: float = profiler_dump_interval,
+        csv_path: str = profiler_csv_path,
+    ):
+        self.enabled = enabled
+        self.window = window
+        self.dump_interval = dump_interval
+        self.csv_path = csv_path
+        self.overlay_enabled = False
+        self.stages: Dict[str, StageTimer] = {}
+        self._last_dump = time.monotonic()
+        self._summary: List[Tuple[str, float, float, float, int]] = []
+        self._summary_time = 0.0
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return _NULL_STAGE
+        timer = self.stages.get(name)
+        if timer is None:
+            timer = self.stages[name] = StageTimer(self.window)
+        return timer
+
+    def toggle_overlay(self) -> None:
+        self.overlay_enabled = self.enabled and not self.overlay_enabled
+
+    def summary(
+        self, max_age: float = 0.0
+    ) -> List[Tuple[str, float, float, float, int]]:
+        """(stage, p50, p95, p99, samples) per stage, recomputed at most every max_age s"""
+        now = time.monotonic()
+        if now - self._summary_time >= max_age:
+            self._summary = [
+                (name, *timer.percentiles(), timer.count)
+                for name, timer in list(self.stages.items())
+            ]
+            self._summary_time = now
+        return self._summary
+
+    def tick(self) -> None:
+        """Called once per frame, dumps the statistics every dump_interval seconds"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self._last_dump >= self.dump_interval:
+            self._last_dump = now
+            self.dump()
+
+    def dump(self) -> None:
+        rows = self.summary()
+        print(
+            "Profiler [ms p50/p95/p99]: "
+            + ", ".join(
+                f"{n} {p50:.2f}/{p95:.2f}/{p99:.2f}" for n, p50, p95, p99, _ in rows
+            )
+        )
+        if not self.csv_path:
+            return
+        try:
+            new_file = not os.path.exists(self.csv_path)
+            with open(self.csv_path, "a", newline="") as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(
+                        ["time", "stage", "p50_ms", "p95_ms", "p99_ms", "samples"]
+                    )
+                stamp = f"{time.time():.3f}"
+                for name, p50, p95, p99, count in rows:
+                    writer.writerow(
+                        [stamp, name, f"{p50:.3f}", f"{p95:.3f}", f"{p99:.3f}", count]
+                    )
+        except OSError as e:
+            print(f"Profiler CSV write failed: {e}")
+
+
+# Global profiler shared by the render, CAN and RX threads
+profiler = FrameProfiler()
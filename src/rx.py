@@ -3,11 +3,14 @@ import cantools
 from cantools import database
 import time
 import os
-import e2e
+import threading
+import numpy as np
+from array import array
 from dataclasses import dataclass, field
 from can import Message
-from typing import List, Tuple, Dict, Optional
+from typing import Callable, List, Tuple, Dict, Optional, NamedTuple
 from defines import *
+from e2e_rx import E2ERxVerifier
 
 # Initialize default CAN messages as module constants
 DEFAULT_RADAR_MESSAGE = Message(
@@ -64,16 +67,163 @@ class ObjectDrawData:
     quality: int = 0
 
 
+# Record layout of one object, same field names as ObjectDrawData
+OBJECT_DTYPE = np.dtype(
+    [
+        ("object_id", np.int32),
+        ("class_type", np.int32),
+        ("data_conf", np.int32),
+        ("data_len", np.float64),
+        ("data_width", np.float64),
+        ("heading_angle", np.float64),
+        ("lat_acc", np.float64),
+        ("lat_pos", np.float64),
+        ("lat_velocity", np.float64),
+        ("lgt_acc", np.float64),
+        ("lgt_pos", np.float64),
+        ("lgt_velocity", np.float64),
+        ("model_info", np.int32),
+        ("quality", np.int32),
+    ]
+)
+
+
+def new_object_records(count: int = 30) -> np.ndarray:
+    """Preallocate the object record buffer, object_id fixed per slot"""
+    records = np.zeros(count, dtype=OBJECT_DTYPE)
+    records["object_id"] = np.arange(count)
+    return records
+
+
+class ObjectView:
+    """
+    Lightweight view of one record in an OBJECT_DTYPE buffer.
+    Exposes the ObjectDrawData attributes without copying the record.
+    """
+
+    __slots__ = ("_record",)
+
+    def __init__(self, records: np.ndarray, index: int):
+        self._record = records[index]  # np.void view into the buffer
+
+    def to_draw_data(self) -> ObjectDrawData:
+        """Detached copy of the current record"""
+        return ObjectDrawData(*self._record.tolist())
+
+
+def _record_field(name: str) -> property:
+    def getter(self):
+        return self._record[name]
+
+    def setter(self, value):
+        self._record[name] = value
+
+    return property(getter, setter)
+
+
+for _name in OBJECT_DTYPE.names:
+    setattr(ObjectView, _name, _record_field(_name))
+
+
+def _object_views(records: np.ndarray) -> List[ObjectView]:
+    return [ObjectView(records, i) for i in range(len(records))]
+
+
 @dataclass
 class RadarView:
-    """Optimized radar object view container"""
+    """
+    Optimized radar object view container, double-buffered per scan.
+    RX fills `objects` (the back buffer) frame by frame and publishes it with
+    an atomic swap once the scan is complete. Consumers copy the latest
+    complete scan with read_published() without taking any lock.
+    A scan cut short by the next scan ID is still published, but the slots
+    of its missing frames get object_id INVALID_OBJECT_ID instead of the
+    objects of an earlier scan.
+    """
 
     msg_counter: int = 0
     scan_id: int = 0
-    object_list_for_draw: List[ObjectDrawData] = field(
-        default_factory=lambda: [ObjectDrawData(object_id=i) for i in range(30)]
+    # Fixed record buffer updated in place, one OBJECT_DTYPE record per object
+    objects: np.ndarray = field(default_factory=new_object_records)
+    object_list_for_draw: List[ObjectView] = field(init=False)
+    # Sequence number of the last published scan and its monotonic time
+    publish_seq: int = 0
+    scan_time: float = 0.0
+    _front: Tuple = field(init=False, repr=False)
+    _spare: Tuple = field(init=False, repr=False)
+    _frames_received: int = field(default=0, init=False, repr=False)
+    _all_frames: int = field(default=0, init=False, repr=False)
+    # Called as listener(records, scan_time, publish_seq) with every scan
+    # right before it is published, on the thread that completes the scan
+    publish_listeners: List[Callable[[np.ndarray, float, int], None]] = field(
+        default_factory=list, repr=False
     )
 
+    def __post_init__(self):
+        self.object_list_for_draw = _object_views(self.objects)
+        spare = self.objects.copy()
+        self._spare = (spare, _object_views(spare))
+        # (records, scan_id, msg_counter, scan_time) of the published scan
+        self._front = (spare, 0, 0, 0.0)
+        self._all_frames = (1 << (len(self.objects) // 2)) - 1
+
+    def begin_frame(self, scan_id: int, msg_counter: int) -> None:
+        """Publish the buffered scan first if this frame starts a new one"""
+        if scan_id != self.scan_id and self._frames_received:
+            self.invalidate_missing()
+            self.publish()
+        self.scan_id = scan_id
+        self.msg_counter = msg_counter
+
+    def invalidate_missing(self) -> None:
+        """Mark the objects of the frames not received for this scan as invalid"""
+        frames = len(self.objects) // 2
+        missing = (self._frames_received >> np.arange(frames)) & 1 == 0
+        self.objects["object_id"][np.repeat(missing, 2)] = INVALID_OBJECT_ID
+
+    def end_frame(self, frame_index: int) -> None:
+        """Mark a frame of the current scan as received, publish once complete"""
+        self._frames_received |= 1 << frame_index
+        if self._frames_received == self._all_frames:
+            self.publish()
+
+    def publish(self) -> None:
+        """Swap the filled back buffer to the front"""
+        records, views = self.objects, self.object_list_for_draw
+        scan_time = time.monotonic()
+        for listener in self.publish_listeners:
+            listener(records, scan_time, self.publish_seq + 1)
+        self._front = (records, self.scan_id, self.msg_counter, scan_time)
+        # readers detect the swap below and retry if they raced with it
+        self.publish_seq += 1
+
+        spare, spare_views = self._spare
+        self._spare = (records, views)
+        # the next scan starts from the published one, the objects of frames
+        # it misses stay invalid
+        np.copyto(spare, records)
+        self.objects, self.object_list_for_draw = spare, spare_views
+        self._frames_received = 0
+
+    def read_published(self, target: "RadarView") -> bool:
+        """
+        Copy the latest complete scan into target (seqlock read).
+        Returns True if target received a new scan.
+        """
+        while True:
+            seq = self.publish_seq
+            if seq == target.publish_seq:
+                return False
+            records, scan_id, msg_counter, scan_time = self._front
+            np.copyto(target.objects, records)
+            if seq == self.publish_seq:
+                break
+        target.scan_id = scan_id
+        target.msg_counter = msg_counter
+        target.scan_time = scan_time
+        target.publish_seq = seq
+        return True
+
 
 # Global radar view instance
 radar_view = RadarView()
@@ -120,31 +270,100 @@ class ObjectList:
     msg_obj_prop: ObjectPairProperties
 
 
+class SnifferRecord(NamedTuple):
+    """One frame captured by the CAN sniffer"""
+
+    sequence: int  # unique per captured frame, never reused
+    timestamp: float
+    arbitration_id: int
+    dlc: int
+    data: bytes
+
+
 @dataclass
 class CanSnifferData:
-    """Container for CAN sniffer display data"""
+    """
+    Ring buffer of raw CAN frames for the sniffer display. Frames are stored
+    as (timestamp, id, dlc, data) in preallocated arrays and only copied out
+    as SnifferRecords for the rows that are actually drawn.
+    """
 
-    messages: List[str] = field(default_factory=list)
-    max_messages: int = 20
+    MAX_DATA = 64  # CAN FD payload size
+
+    capacity: int = can_sniffer_capacity
     enabled: bool = False
+    sequence: int = 0  # frames written in total, also the next record's sequence
+    cleared_at: int = 0  # sequence at the last clear
+    timestamps: array = field(init=False, repr=False)
+    ids: array = field(init=False, repr=False)
+    dlcs: array = field(init=False, repr=False)
+    payloads: bytearray = field(init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self):
+        self.timestamps = array("d", bytes(8 * self.capacity))
+        self.ids = array("I", bytes(4 * self.capacity))
+        self.dlcs = array("B", bytes(self.capacity))
+        self.payloads = bytearray(self.MAX_DATA * self.capacity)
+
+    def __len__(self) -> int:
+        return min(self.sequence - self.cleared_at, self.capacity)
 
     def add_message(self, arbitration_id: int, data: bytes, timestamp: float = None):
-        """Add a new CAN message to the display buffer"""
+        """Store a CAN frame in the ring, overwriting the oldest one when full"""
         if not self.enabled:
             return
 
-        timestamp_str = (
-            f"{time.time():.3f}" if timestamp is None else f"{timestamp:.3f}"
-        )
-        data_hex = data.hex().upper() if data else "00"
-        message_str = (
-            f"ID: 0x{arbitration_id:03X} | Data: {data_hex} | Time: {timestamp_str}"
-        )
+        # Both RX threads write here
+        with self._lock:
+            self._store(arbitration_id, data, timestamp)
+
+    def add_messages(self, frames) -> None:
+        """Store the frames of one batch read under a single lock acquisition"""
+        if not self.enabled:
+            return
 
-        # Add to front of list and limit size
-        self.messages.insert(0, message_str)
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[: self.max_messages]
+        with self._lock:
+            for frame in frames:
+                self._store(frame.arbitration_id, frame.data, frame.timestamp)
+
+    def _store(self, arbitration_id: int, data: bytes, timestamp: float) -> None:
+        length = min(len(data), self.MAX_DATA)
+        slot = self.sequence % self.capacity
+        self.timestamps[slot] = time.time() if timestamp is None else timestamp
+        self.ids[slot] = arbitration_id
+        self.dlcs[slot] = length
+        offset = slot * self.MAX_DATA
+        self.payloads[offset : offset + length] = (
+            data if length == len(data) else data[:length]
+        )
+        self.sequence += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.cleared_at = self.sequence
+
+    def records(self, limit: Optional[int] = None) -> List[SnifferRecord]:
+        """Copy the newest frames out of the ring, newest first"""
+        with self._lock:
+            available = len(self)
+            if limit is not None:
+                available = min(available, limit)
+            result = []
+            for sequence in range(self.sequence - 1, self.sequence - 1 - available, -1):
+                slot = sequence % self.capacity
+                offset = slot * self.MAX_DATA
+                length = self.dlcs[slot]
+                result.append(
+                    SnifferRecord(
+                        sequence,
+                        self.timestamps[slot],
+                        self.ids[slot],
+                        length,
+                        bytes(self.payloads[offset : offset + length]),
+                    )
+                )
+        return result
 
 
 SIGNAL_STATUS_CAN_ID = 0x45  # 69 decimal - FlrFlr1canFr96
@@ -334,6 +553,10 @@ OBJECT_CONFIG: Dict[Tuple[int, int], Tuple[int, int, str, str, str]] = {
         "FLR2RdrObject8To9ScanID",
         "FLR2RdrObject8To9MsgCntr",
     ),
+    # 0x14A repeats the data id and frame name of 0x148, as in the radar's
+    # frame table. Shifting it to 0x8D4 would push 0x152 onto 0x8D8, the data
+    # id of the signal status frame. A shared data id only means the CRC check
+    # cannot tell the two frames apart; counters are checked per CAN ID.
     (10, 11): (
         0x14A,
         0x8D3,
@@ -406,6 +629,40 @@ OBJECT_CONFIG: Dict[Tuple[int, int], Tuple[int, int, str, str, str]] = {
     ),
 }
 
+# CAN IDs the application decodes, everything else is dropped by the kernel
+# while the sniffer is off
+CAN0_RX_IDS: Tuple[int, ...] = (
+    *(config[0] for config in OBJECT_CONFIG.values()),
+    SIGNAL_STATUS_CAN_ID,
+)
+CAN1_RX_IDS: Tuple[int, ...] = (VEHICLE_SPEED, WHEEL_SPEED)
+
+# Buses with an RX filter set, re-applied when the sniffer is toggled
+_filtered_buses: List[Tuple[can.BusABC, List[dict]]] = []
+
+
+def build_can_filters(can_ids) -> List[dict]:
+    """Exact-match standard ID filters for bus.set_filters (kernel side on socketcan)"""
+    return [
+        {"can_id": can_id, "can_mask": 0x7FF, "extended": False}
+        for can_id in sorted(set(can_ids))
+    ]
+
+
+def _apply_rx_filters(bus: can.BusABC, filters: List[dict]) -> None:
+    # The sniffer shows all traffic, so the filter is opened while it runs
+    try:
+        bus.set_filters(None if can_sniffer.enabled else filters)
+    except (OSError, can.CanError) as e:
+        print(f"CAN filter setup failed: {e}")
+
+
+def register_rx_filters(bus: can.BusABC, can_ids) -> None:
+    """Only accept the given CAN IDs on the bus while the sniffer is disabled"""
+    filters = build_can_filters(can_ids)
+    _filtered_buses.append((bus, filters))
+    _apply_rx_filters(bus, filters)
+
 
 def create_object_property(
     obj_id: int, start_obj: int, end_obj: int, prop_index: int
@@ -450,7 +707,12 @@ def create_object_lists() -> Tuple[ObjectList, ...]:
 
         # Create object list
         obj_list = ObjectList(
-            arb_id, e2e_id, frame_name, scan_id, msg_cntr, objects_prop
+            arbitration_id=arb_id,
+            e2e_data_id=e2e_id,
+            msg_name=frame_name,
+            msg_counter_signal=msg_cntr,
+            scan_id_signal=scan_id,
+            msg_obj_prop=objects_prop,
         )
         object_lists.append(obj_list)
 
@@ -463,26 +725,383 @@ _object_lookup: Dict[int, ObjectList] = {
     entry.arbitration_id: entry for entry in object_attribute_list
 }
 
+# E2E data id of every protected radar frame
+SIGNAL_STATUS_E2E_DATA_ID = 0x8D8
+E2E_DATA_IDS: Dict[int, int] = {
+    SIGNAL_STATUS_CAN_ID: SIGNAL_STATUS_E2E_DATA_ID,
+    **{entry.arbitration_id: entry.e2e_data_id for entry in object_attribute_list},
+}
+
+# Checks the radar frames before they are dispatched (None = off)
+rx_e2e: Optional[E2ERxVerifier] = (
+    E2ERxVerifier(E2E_DATA_IDS) if rx_e2e_enabled else None
+)
+
+
+####################################################################
+class CompiledSignal(NamedTuple):
+    """Precomputed bit position, mask and scaling of a single DBC signal"""
+
+    shift: int
+    mask: int
+    sign_bit: int  # 0 for unsigned signals
+    scale: float
+    offset: float
+    big_endian: bool
+    is_integer: bool  # scale 1 / offset 0 -> keep raw integer value
+
+
+def extract_signals(
+    raw_le: int, raw_be: int, signals: Tuple[CompiledSignal, ...]
+) -> List:
+    """Extract the physical values of the compiled signals from a frame"""
+    values = []
+    for shift, mask, sign_bit, scale, offset, big_endian, is_integer in signals:
+        value = ((raw_be if big_endian else raw_le) >> shift) & mask
+        if value & sign_bit:
+            value -= mask + 1
+        values.append(value if is_integer else value * scale + offset)
+    return values
+
+
+@dataclass(frozen=True)
+class ObjectFrameDecoder:
+    """
+    Bit-level decoder for one object-list frame, compiled once from the DBC.
+    Turns the frame bytes straight into the two object records without
+    going through cantools' per-frame signal dictionary.
+    """
+
+    arbitration_id: int
+    index: int  # slot index of the first object in radar_view
+    frame_length: int
+    needs_big_endian: bool
+    frame_header: Tuple[CompiledSignal, CompiledSignal]  # scan_id, msg_counter
+    first_obj: Tuple[CompiledSignal, ...]
+    second_obj: Tuple[CompiledSignal, ...]
+
+    def unpack(self, data) -> Tuple[int, int]:
+        """Return the frame as little- and big-endian integers"""
+        # bytes past the DBC length carry no signals
+        data = data[: self.frame_length]
+        raw_le = int.from_bytes(data, "little")
+        raw_be = 0
+        if self.needs_big_endian:
+            # pad short frames so big-endian bit positions stay aligned
+            raw_be = int.from_bytes(data, "big") << (
+                8 * (self.frame_length - len(data))
+            )
+        return raw_le, raw_be
+
+    def decode_header(self, raw_le: int, raw_be: int) -> List[int]:
+        """Return [scan_id, msg_counter] of the frame"""
+        return extract_signals(raw_le, raw_be, self.frame_header)
+
+    def decode_objects_into(self, raw_le: int, raw_be: int, records: np.ndarray):
+        """Decode both objects of the frame in place into their records"""
+        index = self.index
+        records[index] = (index, *extract_signals(raw_le, raw_be, self.first_obj))
+        records[index + 1] = (
+            index + 1,
+            *extract_signals(raw_le, raw_be, self.second_obj),
+        )
+
+
+# Signal order used by the compiled decoders, matches OBJECT_DTYPE field order
+OBJECT_SIGNAL_FIELDS: Tuple[str, ...] = (
+    "class_signal",
+    "data_conf_signal",
+    "data_len_signal",
+    "data_width_signal",
+    "heading_angle_signal",
+    "lat_acc_signal",
+    "lat_pos_signal",
+    "lat_velocity_signal",
+    "lgt_acc_signal",
+    "lgt_pos_signal",
+    "lgt_velocity_signal",
+    "model_info_signal",
+    "quality_signal",
+)
+
+# Unknown signals decode to a constant zero, same as decoded_message.get(..., 0)
+_ZERO_SIGNAL = CompiledSignal(0, 0, 0, 1, 0, False, True)
+
+
+def compile_signal(dbc_message, signal_name: str) -> CompiledSignal:
+    """Compile one DBC signal into shift/mask/scale form"""
+    try:
+        signal = dbc_message.get_signal_by_name(signal_name)
+    except KeyError:
+        return _ZERO_SIGNAL
+
+    if getattr(signal, "is_float", False):
+        raise ValueError(f"IEEE float signal {signal_name} is not supported")
+
+    frame_bits = dbc_message.length * 8
+    big_endian = signal.byte_order == "big_endian"
+    if big_endian:
+        # DBC start bit is the MSB in sawtooth numbering, convert to a shift
+        # from the LSB of the frame read as one big-endian integer
+        msb_position = 8 * (signal.start // 8) + (7 - signal.start % 8)
+        shift = frame_bits - msb_position - signal.length
+    else:
+        shift = signal.start
+
+    return CompiledSignal(
+        shift=shift,
+        mask=(1 << signal.length) - 1,
+        sign_bit=(1 << (signal.length - 1)) if signal.is_signed else 0,
+        scale=signal.scale,
+        offset=signal.offset,
+        big_endian=big_endian,
+        is_integer=signal.scale == 1 and signal.offset == 0,
+    )
+
+
+def compile_object_decoder(
+    radar_dbc: database.Database, entry: ObjectList, index: int
+) -> ObjectFrameDecoder:
+    """Compile the decoder of one object-list frame"""
+    dbc_message = radar_dbc.get_message_by_frame_id(entry.arbitration_id)
+    first = tuple(
+        compile_signal(dbc_message, getattr(entry.msg_obj_prop.first_obj_prop, name))
+        for name in OBJECT_SIGNAL_FIELDS
+    )
+    second = tuple(
+        compile_signal(dbc_message, getattr(entry.msg_obj_prop.second_obj_prop, name))
+        for name in OBJECT_SIGNAL_FIELDS
+    )
+    scan_id = compile_signal(dbc_message, entry.scan_id_signal)
+    msg_counter = compile_signal(dbc_message, entry.msg_counter_signal)
+    return ObjectFrameDecoder(
+        arbitration_id=entry.arbitration_id,
+        index=index,
+        frame_length=dbc_message.length,
+        needs_big_endian=any(
+            s.big_endian for s in first + second + (scan_id, msg_counter)
+        ),
+        frame_header=(scan_id, msg_counter),
+        first_obj=first,
+        second_obj=second,
+    )
+
+
+def compile_object_decoders(
+    radar_dbc: database.Database,
+) -> Dict[int, ObjectFrameDecoder]:
+    """
+    Compile decoders for all object-list frames in OBJECT_CONFIG.
+    Frames missing from the DBC or using unsupported signal types are left
+    out and keep going through the generic cantools path.
+    """
+    decoders: Dict[int, ObjectFrameDecoder] = {}
+    if not object_attribute_list:
+        return decoders
+
+    reference_id = object_attribute_list[0].arbitration_id
+    for entry in object_attribute_list:
+        try:
+            decoders[entry.arbitration_id] = compile_object_decoder(
+                radar_dbc, entry, entry.arbitration_id - reference_id
+            )
+        except (KeyError, ValueError) as e:
+            print(f"Using generic decode for 0x{entry.arbitration_id:03X}: {e}")
+    return decoders
+
+
+# Compiled decoders, built on first use for the loaded DBC
+_compiled_decoders: Dict[int, ObjectFrameDecoder] = {}
+_compiled_decoders_dbc: Optional[database.Database] = None
+
+
+def get_object_decoders(
+    radar_dbc: database.Database,
+) -> Dict[int, ObjectFrameDecoder]:
+    """Return the compiled object decoders for radar_dbc, compiling them once"""
+    global _compiled_decoders, _compiled_decoders_dbc
+    if _compiled_decoders_dbc is not radar_dbc:
+        _compiled_decoders = compile_object_decoders(radar_dbc)
+        _compiled_decoders_dbc = radar_dbc
+    return _compiled_decoders
+
+
+####################################################################
+class ScanBatchDecoder:
+    """
+    Collects all object-list frames of one scan ID into a contiguous
+    (frames, 64) byte buffer and decodes every object signal of the scan in
+    a single vectorized pass into an OBJECT_DTYPE array.
+    """
+
+    FRAME_BYTES = 64
+    WINDOW_BYTES = 8  # bytes gathered per signal, enough for 57-bit signals
+
+    def __init__(self, decoders: Dict[int, ObjectFrameDecoder]):
+        frame_decoders = sorted(decoders.values(), key=lambda d: d.index)
+        self.row_of: Dict[int, int] = {
+            d.arbitration_id: row for row, d in enumerate(frame_decoders)
+        }
+        rows = len(frame_decoders)
+        self.buffer = np.zeros((rows, self.FRAME_BYTES), dtype=np.uint8)
+        self.received = np.zeros(rows, dtype=bool)
+        self.scan_id: Optional[int] = None
+        self.msg_counter = 0
+        self.decoded_scan_id = 0
+        self.decoded_msg_counter = 0
+
+        # Signal tables, shape (signals, rows): both objects of every frame
+        # followed by the frame header signals
+        fields = len(OBJECT_SIGNAL_FIELDS)
+        signals = [[d.first_obj[f] for d in frame_decoders] for f in range(fields)]
+        signals += [[d.second_obj[f] for d in frame_decoders] for f in range(fields)]
+        signals += [[d.frame_header[h] for d in frame_decoders] for h in (0, 1)]
+        lengths = [d.frame_length for d in frame_decoders]
+
+        byte_index = np.zeros((len(signals), rows, self.WINDOW_BYTES), np.intp)
+        bit_shift = np.zeros((len(signals), rows), np.uint64)
+        for i, row_signals in enumerate(signals):
+            for row, signal in enumerate(row_signals):
+                byte_index[i, row], bit_shift[i, row] = self._signal_window(
+                    signal, lengths[row]
+                )
+
+        def column(name: str, dtype) -> np.ndarray:
+            return np.array(
+                [[getattr(sig, name) for sig in row] for row in signals], dtype=dtype
+            )
+
+        self.byte_index = byte_index
+        self.bit_shift = bit_shift
+        self.mask = column("mask", np.uint64)
+        self.sign_bit = column("sign_bit", np.uint64)
+        self.scale = column("scale", np.float64)
+        self.offset = column("offset", np.float64)
+        self.row_index = np.arange(rows)[None, :, None]
+        self.byte_weight = (np.arange(self.WINDOW_BYTES) * 8).astype(np.uint64)
+        self.fields = fields
+        self.object_index = np.array([d.index for d in frame_decoders], dtype=np.intp)
+        # Slots of the radar view, indexed like it by object id. Only the slots
+        # of the batched frames are decoded, frames that fell back to the
+        # generic decoder keep theirs in the radar view.
+        self.objects = new_object_records(len(radar_view.objects))
+        self.slots = np.concatenate((self.object_index, self.object_index + 1))
+
+    def _signal_window(
+        self, signal: CompiledSignal, frame_length: int
+    ) -> Tuple[List[int], int]:
+        """Bytes holding the signal (LSB byte first) and the shift inside them"""
+        last = self.FRAME_BYTES - 1
+        if signal.big_endian:
+            # the LSB sits in the highest byte, more significant bytes precede it
+            lsb_byte = frame_length - 1 - signal.shift // 8
+            step = -1
+        else:
+            lsb_byte = signal.shift // 8
+            step = 1
+        window = [
+            min(max(lsb_byte + step * k, 0), last) for k in range(self.WINDOW_BYTES)
+        ]
+        return window, signal.shift % 8
+
+    def add_frame(self, arbitration_id: int, data, scan_id: int, msg_counter: int):
+        """
+        Store one frame of a scan. Returns the decoded objects when a scan is
+        complete (all frames received or a new scan ID started), else None.
+        """
+        row = self.row_of.get(arbitration_id)
+        if row is None:
+            return None
+
+        completed = None
+        if scan_id != self.scan_id and self.received.any():
+            completed = self.decode()
+
+        self.scan_id = scan_id
+        self.msg_counter = msg_counter
+        length = min(len(data), self.FRAME_BYTES)
+        self.buffer[row, :length] = np.frombuffer(data, dtype=np.uint8, count=length)
+        self.buffer[row, length:] = 0
+        self.received[row] = True
+
+        if self.received.all():
+            completed = self.decode()
+        return completed
+
+    def decode(self) -> np.ndarray:
+        """Decode every signal of the buffered scan in one vectorized pass"""
+        window = self.buffer[self.row_index, self.byte_index].astype(np.uint64)
+        raw = np.bitwise_or.reduce(window << self.byte_weight, axis=2)
+        raw = (raw >> self.bit_shift) & self.mask
+        values = raw.astype(np.int64)
+        negative = (raw & self.sign_bit) != 0
+        values[negative] -= (self.mask[negative] + 1).astype(np.int64)
+        physical = values * self.scale + self.offset
+
+        fields = self.fields
+        # object_id is fixed per slot, the signal fields follow it
+        for f, name in enumerate(OBJECT_DTYPE.names[1:]):
+            self.objects[name][self.object_index] = physical[f]
+            self.objects[name][self.object_index + 1] = physical[fields + f]
+        # frames missing from a scan cut short leave invalid objects, not the
+        # ones buffered from an earlier scan
+        object_ids = self.objects["object_id"]
+        missing = ~self.received
+        object_ids[self.object_index] = np.where(
+            missing, INVALID_OBJECT_ID, self.object_index
+        )
+        object_ids[self.object_index + 1] = np.where(
+            missing, INVALID_OBJECT_ID, self.object_index + 1
+        )
+
+        self.received[:] = False
+        self.decoded_scan_id = self.scan_id
+        self.decoded_msg_counter = self.msg_counter
+        return self.objects
+
+
+_scan_batch_decoder: Optional[ScanBatchDecoder] = None
+_scan_batch_decoders_src: Optional[Dict[int, ObjectFrameDecoder]] = None
+
+
+def get_scan_batch_decoder(radar_dbc: database.Database) -> ScanBatchDecoder:
+    """Return the batch decoder for radar_dbc, building it once"""
+    global _scan_batch_decoder, _scan_batch_decoders_src
+    decoders = get_object_decoders(radar_dbc)
+    if _scan_batch_decoders_src is not decoders:
+        _scan_batch_decoder = ScanBatchDecoder(decoders)
+        _scan_batch_decoders_src = decoders
+    return _scan_batch_decoder
+
+
+def publish_scan_objects(
+    objects: np.ndarray, slots: np.ndarray, scan_id: int, msg_counter: int
+) -> None:
+    """Copy the batch-decoded slots of a scan into the back buffer and publish it"""
+    radar_view.objects[slots] = objects[slots]
+    radar_view.scan_id, radar_view.msg_counter = scan_id, msg_counter
+    radar_view.publish()
+
 
 def update_object_data(
     decoded_message: dict, obj_prop: ObjectProperty, index: int
 ) -> None:
     """Helper function to update object data efficiently"""
-    radar_view.object_list_for_draw[index] = ObjectDrawData(
-        object_id=obj_prop.object_id,
-        class_type=decoded_message.get(obj_prop.class_signal, 0),
-        data_conf=decoded_message.get(obj_prop.data_conf_signal, 0),
-        data_len=decoded_message.get(obj_prop.data_len_signal, 0.0),
-        data_width=decoded_message.get(obj_prop.data_width_signal, 0.0),
-        heading_angle=decoded_message.get(obj_prop.heading_angle_signal, 0.0),
-        lat_acc=decoded_message.get(obj_prop.lat_acc_signal, 0.0),
-        lat_pos=decoded_message.get(obj_prop.lat_pos_signal, 0),
-        lat_velocity=decoded_message.get(obj_prop.lat_velocity_signal, 0.0),
-        lgt_acc=decoded_message.get(obj_prop.lgt_acc_signal, 0.0),
-        lgt_pos=decoded_message.get(obj_prop.lgt_pos_signal, 0),
-        lgt_velocity=decoded_message.get(obj_prop.lgt_velocity_signal, 0.0),
-        model_info=decoded_message.get(obj_prop.model_info_signal, 0),
-        quality=decoded_message.get(obj_prop.quality_signal, 0),
+    radar_view.objects[index] = (
+        obj_prop.object_id,
+        decoded_message.get(obj_prop.class_signal, 0),
+        decoded_message.get(obj_prop.data_conf_signal, 0),
+        decoded_message.get(obj_prop.data_len_signal, 0.0),
+        decoded_message.get(obj_prop.data_width_signal, 0.0),
+        decoded_message.get(obj_prop.heading_angle_signal, 0.0),
+        decoded_message.get(obj_prop.lat_acc_signal, 0.0),
+        decoded_message.get(obj_prop.lat_pos_signal, 0),
+        decoded_message.get(obj_prop.lat_velocity_signal, 0.0),
+        decoded_message.get(obj_prop.lgt_acc_signal, 0.0),
+        decoded_message.get(obj_prop.lgt_pos_signal, 0),
+        decoded_message.get(obj_prop.lgt_velocity_signal, 0.0),
+        decoded_message.get(obj_prop.model_info_signal, 0),
+        decoded_message.get(obj_prop.quality_signal, 0),
     )
 
 
@@ -499,19 +1118,10 @@ def process_RadarStatus_CAN0(
         print(
             f"Received signal status frame 0x{SIGNAL_STATUS_CAN_ID:03X} with {len(message_radar.data)} bytes"
         )
-        """       
-        # E2E protection check (temporarily disabled for debugging)
-        # TODO: Enable E2E protection with correct data_id once confirmed
-        try:
-            if not e2e.p05.e2e_p05_check(message_radar.data, message_radar.dlc-2, data_id=0x8D8):
-                print(f'E2E protection failed for signal status frame 0x{SIGNAL_STATUS_CAN_ID:03X}, continuing anyway...')
-                # Continue processing even if E2E fails for now
-        except Exception as e:
-            print(f'E2E check error: {e}, continuing anyway...')
-        """
         # Decode the message using DBC
+        # bytes() as batched reads hand over a memoryview cantools can't decode
         decoded_message = radar_dbc.decode_message(
-            message_radar.arbitration_id, message_radar.data
+            message_radar.arbitration_id, bytes(message_radar.data)
         )
 
         # Helper function to safely get and convert values from decoded message
@@ -657,16 +1267,44 @@ def process_ObjectList_CAN0(radar_dbc: database.Database) -> None:
 
     reference_id = object_attribute_list[0].arbitration_id
 
+    decoder = get_object_decoders(radar_dbc).get(message_radar.arbitration_id)
+    if decoder is not None and radar_batch_decode:
+        # Only the frame header is decoded per frame, objects once per scan
+        raw_le, raw_be = decoder.unpack(message_radar.data)
+        scan_id, msg_counter = decoder.decode_header(raw_le, raw_be)
+        batch_decoder = get_scan_batch_decoder(radar_dbc)
+        completed = batch_decoder.add_frame(
+            message_radar.arbitration_id, message_radar.data, scan_id, msg_counter
+        )
+        if completed is not None:
+            publish_scan_objects(
+                completed,
+                batch_decoder.slots,
+                batch_decoder.decoded_scan_id,
+                batch_decoder.decoded_msg_counter,
+            )
+        radar_view.scan_id, radar_view.msg_counter = scan_id, msg_counter
+        return
+
+    if decoder is not None:
+        raw_le, raw_be = decoder.unpack(message_radar.data)
+        radar_view.begin_frame(*decoder.decode_header(raw_le, raw_be))
+        decoder.decode_objects_into(raw_le, raw_be, radar_view.objects)
+        radar_view.end_frame(decoder.index // 2)
+        return
+
     entry = _object_lookup.get(message_radar.arbitration_id)
     if entry is None:
         return
 
     decoded_message = radar_dbc.decode_message(
-        message_radar.arbitration_id, message_radar.data
+        message_radar.arbitration_id, bytes(message_radar.data)
     )
 
-    radar_view.msg_counter = decoded_message.get(entry.msg_counter_signal, 0)
-    radar_view.scan_id = decoded_message.get(entry.scan_id_signal, 0)
+    radar_view.begin_frame(
+        decoded_message.get(entry.scan_id_signal, 0),
+        decoded_message.get(entry.msg_counter_signal, 0),
+    )
 
     index_entry = entry.arbitration_id - reference_id
 
@@ -674,6 +1312,7 @@ def process_ObjectList_CAN0(radar_dbc: database.Database) -> None:
     update_object_data(
         decoded_message, entry.msg_obj_prop.second_obj_prop, index_entry + 1
     )
+    radar_view.end_frame(index_entry // 2)
 
     print(f"Processing arbitration_id: 0x{message_radar.arbitration_id:03X}")
 
@@ -682,10 +1321,50 @@ def process_CAN0_rx(radar_dbc: database.Database, can_bus_radar) -> RadarView:
     """Optimized radar message processing with improved error handling"""
     global message_radar
 
-    try:
-        if is_raspberrypi():
+    if is_raspberrypi():
+        try:
             message_radar = can_bus_radar.recv(timeout=0.1)
+        except OSError as e:
+            print(f"Radar CAN bus error: {e}")
+            return radar_view
+
+    return handle_CAN0_message(radar_dbc, message_radar)
+
+
+def _handle_radar_status(radar_dbc: database.Database, message) -> None:
+    # Signal status frame is processed regardless of sniffer state
+    print(f"  → Signal Status Frame (0x45): {len(message.data)} bytes received")
+    # Print detailed radar data in CLI
+    print(
+        f"Radar CAN Message: ID=0x{message.arbitration_id:03X} ({message.arbitration_id}) | "
+        f"DLC={message.dlc} | Data={message.data.hex().upper()} | "
+        f"Bytes=[{', '.join(f'0x{b:02X}' for b in message.data)}]"
+    )
+
+    process_RadarStatus_CAN0(radar_dbc, message)
+
+
+def _handle_object_list(radar_dbc: database.Database, message) -> None:
+    # If sniffer is enabled, skip object list processing
+    if can_sniffer.enabled:
+        return
+
+    process_ObjectList_CAN0(radar_dbc)
+
+
+# Radar frame handlers by CAN ID, one dict lookup per frame
+CAN0_DISPATCH: Dict[int, Callable[[database.Database, Message], None]] = {
+    SIGNAL_STATUS_CAN_ID: _handle_radar_status,
+    **{config[0]: _handle_object_list for config in OBJECT_CONFIG.values()},
+}
+
 
+def handle_CAN0_message(radar_dbc: database.Database, message) -> RadarView:
+    """Process one received radar frame (polling loop or RX engine thread)"""
+    global message_radar
+    message_radar = message
+
+    try:
         # Check if message is None (timeout or no message)
         if message_radar is None:
             return radar_view
@@ -697,30 +1376,7 @@ def process_CAN0_rx(radar_dbc: database.Database, can_bus_radar) -> RadarView:
             getattr(message_radar, "timestamp", None),
         )
 
-        # Special handling for signal status frame
-        if message_radar.arbitration_id == SIGNAL_STATUS_CAN_ID:
-            print(
-                f"  → Signal Status Frame (0x45): {len(message_radar.data)} bytes received"
-            )
-
-        # Process signal status frame regardless of sniffer state
-        if message_radar.arbitration_id == SIGNAL_STATUS_CAN_ID:
-            # Print detailed radar data in CLI
-            print(
-                f"Radar CAN Message: ID=0x{message_radar.arbitration_id:03X} ({message_radar.arbitration_id}) | "
-                f"DLC={message_radar.dlc} | Data={message_radar.data.hex().upper()} | "
-                f"Bytes=[{', '.join(f'0x{b:02X}' for b in message_radar.data)}]"
-            )
-
-            process_RadarStatus_CAN0(radar_dbc, message_radar)
-            return radar_view
-
-        # If sniffer is enabled, skip other processing
-        if can_sniffer.enabled:
-            return radar_view
-
-        # Process object list frames
-        process_ObjectList_CAN0(radar_dbc)
+        _dispatch_CAN0(radar_dbc, message_radar)
 
     except OSError as e:
         print(f"Radar CAN bus error: {e}")
@@ -731,6 +1387,30 @@ def process_CAN0_rx(radar_dbc: database.Database, can_bus_radar) -> RadarView:
     return radar_view
 
 
+def handle_CAN0_batch(radar_dbc: database.Database, frames) -> RadarView:
+    """Process the frames of one batch read (RX engine batch reader)"""
+    global message_radar
+
+    can_sniffer.add_messages(frames)
+    for message in frames:
+        # the object list decoder reads the frame from message_radar
+        message_radar = message
+        try:
+            _dispatch_CAN0(radar_dbc, message)
+        except Exception as e:
+            print(f"Unexpected radar processing error: {e}")
+
+    return radar_view
+
+
+def _dispatch_CAN0(radar_dbc: database.Database, message) -> None:
+    handler = CAN0_DISPATCH.get(message.arbitration_id)
+    if handler is not None and (
+        rx_e2e is None or rx_e2e.accept(message.arbitration_id, message.data)
+    ):
+        handler(radar_dbc, message)
+
+
 """
 | CAN ID (hex)    | Function (Suspected / Confirmed)                    |
 | --------------- | --------------------------------------------------- |
@@ -757,13 +1437,46 @@ def process_CAN1_rx(can_bus_car) -> EgoMotion:
     """Optimized vehicle CAN message processing"""
     global message_car
 
+    if is_raspberrypi():
+        try:
+            message_car = can_bus_car.recv(timeout=0.1)
+        except OSError as e:
+            print(f"Vehicle CAN bus error: {e}")
+            return ego_motion_data
+
+    return handle_CAN1_message(message_car)
+
+
+def _vehicle_speed_values(message) -> dict:
+    # TODO: Implement proper DBC decoding when available
+    return {"speed": 0}  # radar_dbc.decode_message(...)
+
+
+def _wheel_speed_values(message) -> dict:
+    print(f"Vehicle CAN ID: 0x{message.arbitration_id:03X}, Data: {message.data.hex()}")
+    # TODO: Implement proper DBC decoding when available
+    return {
+        "left_wheel_speed": 0,  # radar_dbc.decode_message(...)
+        "right_wheel_speed": 0,  # radar_dbc.decode_message(...)
+    }
+
+
+# Vehicle frame decoders by CAN ID, each returns the EgoMotion fields to update
+CAN1_DISPATCH: Dict[int, Callable[[Message], dict]] = {
+    VEHICLE_SPEED: _vehicle_speed_values,
+    WHEEL_SPEED: _wheel_speed_values,
+}
+
+
+def handle_CAN1_message(message) -> EgoMotion:
+    """Process one received vehicle frame (polling loop or RX engine thread)"""
+    global message_car
+    message_car = message
+
     # Use immutable replacement pattern for frozen dataclass
     updated_values = {}
 
     try:
-        if is_raspberrypi():
-            message_car = can_bus_car.recv(timeout=0.1)
-
         # Check if message is None (timeout or no message)
         if message_car is None:
             return ego_motion_data
@@ -779,23 +1492,9 @@ def process_CAN1_rx(can_bus_car) -> EgoMotion:
         if can_sniffer.enabled:
             return ego_motion_data
 
-        # Process vehicle speed
-        if message_car.arbitration_id == VEHICLE_SPEED:
-            # TODO: Implement proper DBC decoding when available
-            updated_values["speed"] = 0  # radar_dbc.decode_message(...)
-
-        # Process wheel speeds
-        elif message_car.arbitration_id == WHEEL_SPEED:
-            # TODO: Implement proper DBC decoding when available
-            updated_values.update(
-                {
-                    "left_wheel_speed": 0,  # radar_dbc.decode_message(...)
-                    "right_wheel_speed": 0,  # radar_dbc.decode_message(...)
-                }
-            )
-            print(
-                f"Vehicle CAN ID: 0x{message_car.arbitration_id:03X}, Data: {message_car.data.hex()}"
-            )
+        decoder = CAN1_DISPATCH.get(message_car.arbitration_id)
+        if decoder is not None:
+            updated_values = decoder(message_car)
 
     except OSError as e:
         print(f"Vehicle CAN bus error: {e}")
@@ -810,11 +1509,37 @@ def process_CAN1_rx(can_bus_car) -> EgoMotion:
     return ego_motion_data
 
 
+def handle_CAN1_batch(frames) -> EgoMotion:
+    """
+    Process the frames of one batch read (RX engine batch reader). The values
+    of every frame in the batch go into one EgoMotion, later frames win.
+    """
+    can_sniffer.add_messages(frames)
+    if can_sniffer.enabled:
+        return ego_motion_data
+
+    updated_values = {}
+    for message in frames:
+        decoder = CAN1_DISPATCH.get(message.arbitration_id)
+        if decoder is not None:
+            try:
+                updated_values.update(decoder(message))
+            except Exception as e:
+                print(f"Unexpected vehicle processing error: {e}")
+
+    if updated_values:
+        return EgoMotion(**{**ego_motion_data.__dict__, **updated_values})
+
+    return ego_motion_data
+
+
 def toggle_can_sniffer():
     """Toggle CAN sniffer mode"""
     can_sniffer.enabled = not can_sniffer.enabled
     if can_sniffer.enabled:
-        can_sniffer.messages.clear()  # Clear old messages when enabling
+        can_sniffer.clear()  # Clear old messages when enabling
+    for bus, filters in _filtered_buses:
+        _apply_rx_filters(bus, filters)
     print(f"CAN Sniffer {'enabled' if can_sniffer.enabled else 'disabled'}")
 
 
@@ -831,11 +1556,22 @@ __all__ = [
     "radar_signal_status",
     "ego_motion_data",
     "can_sniffer",
+    "SnifferRecord",
     "process_CAN0_rx",
     "process_CAN1_rx",
+    "handle_CAN0_message",
+    "handle_CAN1_message",
+    "handle_CAN0_batch",
+    "handle_CAN1_batch",
     "process_RadarStatus_CAN0",
     "toggle_can_sniffer",
+    "register_rx_filters",
+    "CAN0_RX_IDS",
+    "CAN1_RX_IDS",
     "FlrFlr1canFr96",
     "ObjectDrawData",
+    "ObjectView",
+    "OBJECT_DTYPE",
+    "RadarView",
     "EgoMotion",
 ]
@@ -0,0 +1,410 @@
+import ctypes
+import errno
+import os
+import queue
+import select
+import socket
+import struct
+import sys
+import threading
+import time
+import can
+from typing import Callable, List, NamedTuple, Optional, Union
+from defines import rx_batch_read, rx_batch_size, rx_queue_size
+
+# struct canfd_frame: can_id (4), len (1), flags/reserved (3), data (64)
+CANFD_MTU = 72
+CAN_FRAME_DATA_OFFSET = 8
+CAN_EFF_MASK = 0x1FFFFFFF
+CAN_ERR_FLAG = 0x20000000
+
+# Ancillary data of a received frame: the kernel timestamp (enabled by
+# python-can's socketcan bus) and, once enabled, the socket's drop counter.
+# SO_RXQ_OVFL is not exported by the socket module.
+SO_TIMESTAMPNS = getattr(socket, "SO_TIMESTAMPNS", 35)
+SO_RXQ_OVFL = getattr(socket, "SO_RXQ_OVFL", 40)
+TIMESPEC = struct.Struct("@ll")
+DROP_COUNTER = struct.Struct("=I")
+CMSG_HEADER = struct.Struct("@Nii")  # cmsg_len, cmsg_level, cmsg_type
+CMSG_ALIGN = struct.calcsize("@N")
+# The timestamp comes first, header and timespec are read in one go
+TIMESTAMP_CMSG = struct.Struct("@Niill")
+SIZE_T = struct.Struct("@N")
+
+
+class RawFrame(NamedTuple):
+    """
+    One received frame as (id, timestamp, data). From the socketcan reader the
+    data is a memoryview into a reused buffer, valid until the next batch read.
+    """
+
+    arbitration_id: int
+    timestamp: float
+    data: Union[memoryview, bytearray]
+
+    @property
+    def dlc(self) -> int:
+        return len(self.data)
+
+
+class BoundedQueueListener(can.Listener):
+    """python-can listener pushing frames into a bounded queue, dropping the oldest when full"""
+
+    def __init__(self, max_size: int):
+        self.queue: "queue.Queue[Optional[can.Message]]" = queue.Queue(maxsize=max_size)
+        self.dropped = 0
+
+    def on_message_received(self, msg: can.Message) -> None:
+        while True:
+            try:
+                self.queue.put_nowait(msg)
+                return
+            except queue.Full:
+                # Keep the newest frames, the oldest ones are stale by now
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def on_error(self, exc: Exception) -> None:
+        print(f"CAN RX error: {exc}")
+
+
+class _IoVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_IoVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+def _load_recvmmsg():
+    """libc's recvmmsg(2), None where it does not exist (not Linux)"""
+    try:
+        recvmmsg = ctypes.CDLL(None, use_errno=True).recvmmsg
+    except (AttributeError, OSError, TypeError):
+        return None
+    recvmmsg.argtypes = [
+        ctypes.c_int,
+        ctypes.POINTER(_MMsgHdr),
+        ctypes.c_uint,
+        ctypes.c_int,
+        ctypes.c_void_p,
+    ]
+    recvmmsg.restype = ctypes.c_int
+    return recvmmsg
+
+
+_recvmmsg = _load_recvmmsg()
+
+
+class SocketCanBatchReader:
+    """
+    Drains up to batch_size pending frames of a raw socketcan socket with one
+    recvmmsg call into a reusable buffer. Each frame comes with its kernel
+    timestamp, and the kernel's drop counter of the socket is kept.
+    """
+
+    def __init__(self, sock: socket.socket, batch_size: int):
+        self.sock = sock
+        self.fd = sock.fileno()
+        self.batch_size = batch_size
+        self.buffer = bytearray(CANFD_MTU * batch_size)
+        self.view = memoryview(self.buffer)
+        self.frames: List[RawFrame] = []
+        # Frames the kernel dropped because the socket buffer was full
+        self.dropped = 0
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+        except OSError:
+            pass
+
+        # One iovec and one ancillary data buffer per frame slot
+        self.control_size = socket.CMSG_SPACE(TIMESPEC.size) + socket.CMSG_SPACE(
+            DROP_COUNTER.size
+        )
+        self.control = bytearray(self.control_size * batch_size)
+        self.timestamp_space = socket.CMSG_SPACE(TIMESPEC.size)
+        buffer_address = ctypes.addressof(
+            (ctypes.c_char * len(self.buffer)).from_buffer(self.buffer)
+        )
+        control_address = ctypes.addressof(
+            (ctypes.c_char * len(self.control)).from_buffer(self.control)
+        )
+        self.iovecs = (_IoVec * batch_size)()
+        self.headers = (_MMsgHdr * batch_size)()
+        for i in range(batch_size):
+            self.iovecs[i].iov_base = buffer_address + i * CANFD_MTU
+            self.iovecs[i].iov_len = CANFD_MTU
+            header = self.headers[i].msg_hdr
+            header.msg_iov = ctypes.pointer(self.iovecs[i])
+            header.msg_iovlen = 1
+            header.msg_control = control_address + i * self.control_size
+            header.msg_controllen = self.control_size
+        # The kernel writes msg_len, msg_controllen and msg_flags of every
+        # header it fills, the pristine copy restores them after a read
+        self.header_template = bytes(self.headers)
+        self.header_view = memoryview(self.headers).cast("B")
+        self.header_size = ctypes.sizeof(_MMsgHdr)
+        self.controllen_offset = _MMsgHdr.msg_hdr.offset + _MsgHdr.msg_controllen.offset
+
+    def read_batch(self, timeout: float) -> List[RawFrame]:
+        """Wait up to timeout for traffic, then read what is pending in one call"""
+        frames = self.frames
+        frames.clear()
+        ready, _, _ = select.select([self.sock], [], [], timeout)
+        if not ready:
+            return frames
+
+        # MSG_DONTWAIT leaves the blocking mode of the shared bus socket alone
+        count = _recvmmsg(
+            self.fd, self.headers, self.batch_size, socket.MSG_DONTWAIT, None
+        )
+        if count < 0:
+            error = ctypes.get_errno()
+            if error in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return frames
+            raise OSError(error, os.strerror(error))
+
+        now = time.time()
+        view = self.view
+        header_view = self.header_view
+        header_size = self.header_size
+        controllen_offset = self.controllen_offset
+        for i in range(count):
+            control_length = SIZE_T.unpack_from(
+                header_view, i * header_size + controllen_offset
+            )[0]
+            timestamp = self._read_control(i, control_length) or now
+            offset = i * CANFD_MTU
+            can_id = int.from_bytes(view[offset : offset + 4], sys.byteorder)
+            if can_id & CAN_ERR_FLAG:
+                continue
+            start = offset + CAN_FRAME_DATA_OFFSET
+            data = view[start : start + view[offset + 4]]
+            frames.append(RawFrame(can_id & CAN_EFF_MASK, timestamp, data))
+        ctypes.memmove(self.headers, self.header_template, count * header_size)
+        return frames
+
+    def _read_control(self, index: int, length: int) -> Optional[float]:
+        """
+        Walk the ancillary data of one frame. Returns its kernel timestamp and
+        takes the drop counter, total since the socket was opened, which the
+        kernel adds to every frame queued after the first drop.
+        """
+        control = self.control
+        offset = index * self.control_size
+        end = offset + length
+        timestamp = None
+        if length >= TIMESTAMP_CMSG.size:
+            cmsg_len, level, kind, seconds, nanoseconds = TIMESTAMP_CMSG.unpack_from(
+                control, offset
+            )
+            if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS:
+                timestamp = seconds + nanoseconds * 1e-9
+                if length == self.timestamp_space:
+                    # no drops so far, nothing else follows
+                    return timestamp
+        data_offset = socket.CMSG_LEN(0)
+        while offset + CMSG_HEADER.size <= end:
+            cmsg_len, level, kind = CMSG_HEADER.unpack_from(control, offset)
+            if cmsg_len < CMSG_HEADER.size:
+                break
+            if level == socket.SOL_SOCKET:
+                if kind == SO_TIMESTAMPNS:
+                    seconds, nanoseconds = TIMESPEC.unpack_from(
+                        control, offset + data_offset
+                    )
+                    timestamp = seconds + nanoseconds * 1e-9
+                elif kind == SO_RXQ_OVFL:
+                    self.dropped = DROP_COUNTER.unpack_from(
+                        control, offset + data_offset
+                    )[0]
+            offset += (cmsg_len + CMSG_ALIGN - 1) & -CMSG_ALIGN
+        return timestamp
+
+
+class BusBatchReader:
+    """Batch reader adapter over Bus.recv, for interfaces without a raw socket (virtual bus)"""
+
+    def __init__(self, bus: can.BusABC, batch_size: int):
+        self.bus = bus
+        self.batch_size = batch_size
+        self.frames: List[RawFrame] = []
+        # Bus.recv does not report drops
+        self.dropped = 0
+
+    def read_batch(self, timeout: float) -> List[RawFrame]:
+        frames = self.frames
+        frames.clear()
+        msg = self.bus.recv(timeout)
+        while msg is not None:
+            frames.append(RawFrame(msg.arbitration_id, msg.timestamp, msg.data))
+            if len(frames) >= self.batch_size:
+                break
+            msg = self.bus.recv(0)
+        return frames
+
+
+def open_batch_reader(bus: can.BusABC, batch_size: int = rx_batch_size):
+    """Raw socket reader for socketcan buses, Bus.recv adapter for everything else"""
+    sock = getattr(bus, "socket", None)
+    if (
+        _recvmmsg is not None
+        and isinstance(sock, socket.socket)
+        and sock.family == getattr(socket, "AF_CAN", None)
+    ):
+        return SocketCanBatchReader(sock, batch_size)
+    return BusBatchReader(bus, batch_size)
+
+
+class BusReceiver:
+    """Drains one CAN bus independently: notifier thread -> bounded queue -> handler thread"""
+
+    def __init__(
+        self, name: str, bus: can.BusABC, handler: Callable[[can.Message], None]
+    ):
+        self.name = name
+        self.bus = bus
+        self.handler = handler
+        self.listener = BoundedQueueListener(rx_queue_size)
+        self.notifier: Optional[can.Notifier] = None
+        self.worker = threading.Thread(target=self._run, name=f"rx-{name}", daemon=True)
+
+    def start(self) -> None:
+        self.notifier = can.Notifier(self.bus, [self.listener], timeout=1.0)
+        self.worker.start()
+
+    def stop(self) -> None:
+        if self.notifier is not None:
+            self.notifier.stop()
+        self.listener.queue.put(None)  # wake the handler thread
+        self.worker.join(timeout=1.0)
+
+    def _run(self) -> None:
+        # Blocks on the queue, so an idle bus costs no CPU
+        while True:
+            msg = self.listener.queue.get()
+            if msg is None:
+                break
+            try:
+                self.handler(msg)
+            except Exception as e:
+                print(f"{self.name} RX handler error: {e}")
+
+    @property
+    def dropped(self) -> int:
+        return self.listener.dropped
+
+
+def handle_each(
+    handler: Callable[[RawFrame], None],
+) -> Callable[[List[RawFrame]], None]:
+    """Batch handler passing the frames of a batch one by one to a frame handler"""
+
+    def handle_batch(frames: List[RawFrame]) -> None:
+        for frame in frames:
+            handler(frame)
+
+    return handle_batch
+
+
+class BatchBusReceiver:
+    """Drains one CAN bus in batches and runs the batch handler on the reading thread"""
+
+    def __init__(
+        self, name: str, bus: can.BusABC, handler: Callable[[List[RawFrame]], None]
+    ):
+        self.name = name
+        self.bus = bus
+        self.handler = handler
+        self.reader = open_batch_reader(bus)
+        self.stop_event = threading.Event()
+        self.worker = threading.Thread(target=self._run, name=f"rx-{name}", daemon=True)
+
+    def start(self) -> None:
+        self.worker.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.worker.join(timeout=1.0)
+
+    def _run(self) -> None:
+        # Frames reference the reader's buffer, so they are handled before the
+        # next read instead of being queued; the socket buffer is the queue
+        while not self.stop_event.is_set():
+            try:
+                frames = self.reader.read_batch(0.1)
+            except OSError as e:
+                print(f"{self.name} CAN bus error: {e}")
+                self.stop_event.wait(0.1)
+                continue
+            if not frames:
+                continue
+            try:
+                self.handler(frames)
+            except Exception as e:
+                print(f"{self.name} RX handler error: {e}")
+
+    @property
+    def dropped(self) -> int:
+        # Overruns happen in the kernel socket buffer, counted by the kernel
+        return self.reader.dropped
+
+
+class RxEngine:
+    """Event-driven CAN reception, one BusReceiver per bus"""
+
+    def __init__(self):
+        self.receivers: List[Union[BusReceiver, BatchBusReceiver]] = []
+
+    def add_bus(
+        self,
+        name: str,
+        bus: can.BusABC,
+        handler: Callable[[can.Message], None],
+        batch_handler: Optional[Callable[[List[RawFrame]], None]] = None,
+    ) -> None:
+        """
+        handler takes one frame. With rx_batch_read, batch_handler takes the
+        frames of one read, handler is called per frame when it is not given.
+        """
+        if rx_batch_read:
+            receiver = BatchBusReceiver(
+                name, bus, batch_handler or handle_each(handler)
+            )
+        else:
+            receiver = BusReceiver(name, bus, handler)
+        self.receivers.append(receiver)
+
+    def start(self) -> None:
+        for receiver in self.receivers:
+            receiver.start()
+            print(f"RX engine: {receiver.name} reception started")
+
+    def stop(self) -> None:
+        for receiver in self.receivers:
+            receiver.stop()
+
+    def dropped_frames(self) -> dict:
+        """Frames dropped per bus because its handler fell behind"""
+        return {r.name: r.dropped for r in self.receivers}
+
+    def format_dropped(self) -> str:
+        dropped = ", ".join(
+            f"{name} {count}" for name, count in self.dropped_frames().items()
+        )
+        return f"RX dropped frames: {dropped or 'no buses'}"
@@ -3,12 +3,12 @@ import random
 import time
 import numpy as np
 from typing import List
-from rx import radar_view, ego_motion_data, ObjectDrawData
+from rx import radar_view, ego_motion_data
 from defines import *
 
 # Timing control for simulation
 last_update_time = 0.0
-simulation_fps = 30  # Slower simulation update rate to control object movement speed
+simulation_scan_interval = 0.06  # One simulated radar scan per radar cycle (60ms)
 
 
 def map_value(value: float, from_low: float, from_high: float, to_low: float, to_high: float) -> float:
@@ -34,48 +34,43 @@ def init_process_sim_radar() -> None:
     object_class[:] = np.random.randint(0, 4, size=30)
     longvelo_speed[:] = np.random.uniform(5.0, 30.0, size=30)  # Reduced speed range for more realistic movement
         
+def update_sim_objects(records: np.ndarray) -> None:
+    """Write the simulated objects into the radar record buffer in place"""
+    count = len(records)
+    records["class_type"] = object_class[:count]
+    records["data_conf"] = np.random.randint(50, 101, size=count)
+    records["data_len"] = 30.0
+    records["data_width"] = 20.0
+    records["heading_angle"] = np.random.uniform(-180.0, 180.0, size=count)
+    records["lat_acc"] = np.random.uniform(-2.0, 2.0, size=count)
+    records["lat_pos"] = latposition[:count]
+    records["lat_velocity"] = np.random.uniform(-5.0, 5.0, size=count)
+    records["lgt_acc"] = np.random.uniform(-2.0, 2.0, size=count)
+    records["lgt_pos"] = longposition[:count]
+    records["lgt_velocity"] = longvelo_speed[:count]
+    records["model_info"] = np.random.randint(0, 11, size=count)
+    records["quality"] = np.random.randint(50, 101, size=count)
+
 def process_sim_radar(radar_dbc, can_bus_radar, can_bus_car) -> None:
     """Optimized radar simulation with vectorized operations"""
     global latposition, longposition, last_update_time
     
     current_time = time.time()
     
-    # Only update positions at controlled rate
-    if current_time - last_update_time < (1.0 / simulation_fps):
-        # Just update the radar view without moving objects
-        for i in range(len(radar_view.object_list_for_draw)):
-            radar_view.object_list_for_draw[i] = ObjectDrawData(
-                object_id=i,
-                class_type=int(object_class[i]),
-                data_conf=random.randint(50, 100),
-                data_len=30.0,
-                data_width=20.0,
-                heading_angle=random.uniform(-180.0, 180.0),
-                lat_acc=random.uniform(-2.0, 2.0),
-                lat_pos=int(latposition[i]),
-                lat_velocity=random.uniform(-5.0, 5.0),
-                lgt_acc=random.uniform(-2.0, 2.0),
-                lgt_pos=int(longposition[i]),
-                lgt_velocity=float(longvelo_speed[i]),
-                model_info=random.randint(0, 10),
-                quality=random.randint(50, 100)
-            )
+    # A new scan is only published once per radar cycle, like the real radar,
+    # so consumers see one new scan per cycle
+    if current_time - last_update_time < simulation_scan_interval:
         return
 
     last_update_time = current_time
 
     # Update message counter (optimized)
     radar_view.msg_counter = 1  # Could be random.randint(1, 100) if needed
+    radar_view.scan_id = (radar_view.scan_id + 1) & 0xFF
 
-    # Vectorized position updates (now at controlled rate) - reduced movement speed
-    # Use integer arithmetic to avoid casting issues, move every other update
-    global update_counter
-    if not hasattr(process_sim_radar, 'update_counter'):
-        process_sim_radar.update_counter = 0
-    
-    process_sim_radar.update_counter += 1
-    if process_sim_radar.update_counter % 2 == 0:  # Move every other update for slower movement
-        longposition += 1
+    # Vectorized position updates, one step per scan
+    # Use integer arithmetic to avoid casting issues
+    longposition += 1
     
     # Handle boundary conditions with numpy operations
     mask_lat_high = latposition > surface_width
@@ -89,23 +84,8 @@ def process_sim_radar(radar_dbc, can_bus_radar, can_bus_car) -> None:
     longposition[mask_long_low] = 0
 
     # Update objects in batch
-    for i in range(len(radar_view.object_list_for_draw)):
-        radar_view.object_list_for_draw[i] = ObjectDrawData(
-            object_id=i,
-            class_type=int(object_class[i]),
-            data_conf=random.randint(50, 100),
-            data_len=30.0,
-            data_width=20.0,
-            heading_angle=random.uniform(-180.0, 180.0),
-            lat_acc=random.uniform(-2.0, 2.0),
-            lat_pos=int(latposition[i]),
-            lat_velocity=random.uniform(-5.0, 5.0),
-            lgt_acc=random.uniform(-2.0, 2.0),
-            lgt_pos=int(longposition[i]),
-            lgt_velocity=float(longvelo_speed[i]),
-            model_info=random.randint(0, 10),
-            quality=random.randint(50, 100)
-        )
+    update_sim_objects(radar_view.objects)
+    radar_view.publish()
 
 def process_sim_car(main_can_bus_car):
     """Optimized car simulation with immutable data structures"""
@@ -0,0 +1,73 @@
+import threading
+import time
+from typing import Optional, Tuple
+from defines import (
+    get_platform_config,
+    get_temperature_sources,
+    temperature_sample_interval,
+)
+
+
+class TemperatureSampler:
+    """
+    Samples the CPU temperature on a background thread so the renderer never
+    blocks on sysfs reads or subprocesses. The source that worked last is
+    tried first; the full list is only walked again when it fails.
+    """
+
+    def __init__(self, interval: float = temperature_sample_interval):
+        self.interval = interval
+        # Source that returned a value last, None to walk the full list
+        self.source: Optional[str] = None
+        # (temperature, time.monotonic() of the sample), replaced atomically
+        self.reading: Tuple[Optional[float], float] = (None, 0.0)
+        self._sources = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            # Start with the source found by the platform probe
+            self.source = get_platform_config().thermal_source or None
+            self._thread = threading.Thread(
+                target=self._run, name="temperature", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def read(self) -> Optional[float]:
+        """Last sampled temperature in Celsius, None until the first sample"""
+        # Sampling starts with the first frame that shows the temperature
+        self.start()
+        return self.reading[0]
+
+    def sample(self) -> Optional[float]:
+        if self._sources is None:
+            self._sources = get_temperature_sources()
+
+        # Remembered source first, then everything else in platform order
+        ordered = sorted(self._sources, key=lambda source: source[0] != self.source)
+        for name, reader in ordered:
+            try:
+                temp = reader()
+            except Exception:
+                continue
+            if temp is not None:
+                self.source = name
+                self.reading = (temp, time.monotonic())
+                return temp
+
+        self.source = None
+        self.reading = (None, time.monotonic())
+        return None
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self.sample()
+            self._stop_event.wait(self.interval)
+
+
+# Global sampler shared by all screens
+temperature_sampler = TemperatureSampler()
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, Tuple
+from pygame import Surface
+from pygame import font as pygame_font
+from defines import text_cache_size
+
+
+class CachedFont:
+    """pygame Font whose render() goes through the shared text cache"""
+
+    def __init__(self, cache: "TextCache", size: int):
+        self.cache = cache
+        self.size_px = size
+        self.font = pygame_font.Font(pygame_font.get_default_font(), size)
+
+    def render(self, text, antialias, color, background=None) -> Surface:
+        return self.cache.render(self, text, antialias, color, background)
+
+    def render_uncached(self, text, antialias, color, background=None) -> Surface:
+        """For text that seldom repeats, so it does not evict the cached labels"""
+        return self.font.render(text, antialias, color, background)
+
+    def __getattr__(self, name):
+        # size(), get_linesize(), ... come from the wrapped font
+        return getattr(self.font, name)
+
+
+class TextCache:
+    """
+    Rendered text surfaces keyed by (text, size, colour, antialias, background)
+    with least-recently-used eviction. Returned surfaces are shared and must
+    not be modified.
+    """
+
+    def __init__(self, max_entries: int = text_cache_size):
+        self.max_entries = max_entries
+        self.fonts: Dict[int, CachedFont] = {}
+        self.surfaces: "OrderedDict[Tuple[Hashable, ...], Surface]" = OrderedDict()
+
+    def get_font(self, size: int) -> CachedFont:
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = CachedFont(self, size)
+        return font
+
+    def render(
+        self, font: CachedFont, text, antialias, color, background=None
+    ) -> Surface:
+        key = (
+            text,
+            font.size_px,
+            tuple(color),
+            bool(antialias),
+            None if background is None else tuple(background),
+        )
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = font.font.render(text, antialias, color, background)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+# Shared by every screen, only used from the visualization thread
+text_cache = TextCache()
@@ -0,0 +1,207 @@
+import time
+import numpy as np
+from typing import Optional, Tuple
+from defines import (
+    INVALID_OBJECT_ID,
+    motion_prediction_scale,
+    track_alpha,
+    track_beta,
+    track_capacity,
+    track_gate_distance,
+    track_max_misses,
+    track_min_data_conf,
+    track_time_budget,
+)
+
+TRACK_DTYPE = np.dtype(
+    [
+        ("track_id", np.int64),
+        ("object_id", np.int32),
+        ("class_type", np.int32),
+        ("age", np.int32),  # scans since the track was created
+        ("hits", np.int32),
+        ("misses", np.int32),  # consecutive scans without a detection
+        ("confidence", np.float64),  # 0..1, raised by hits, decayed by misses
+        ("lat_pos", np.float64),
+        ("lgt_pos", np.float64),
+        ("lat_velocity", np.float64),  # screen units per second
+        ("lgt_velocity", np.float64),
+        ("active", np.bool_),
+    ]
+)
+
+# Confidence step per hit or miss
+CONFIDENCE_GAIN = 0.3
+
+
+def greedy_assignment(cost: np.ndarray, gate: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pairs rows and columns of cost by increasing cost, each at most once.
+    Pairs above gate are never made. Returns (rows, columns) of the pairs.
+    """
+    rows, cols = np.nonzero(cost <= gate)
+    if len(rows) == 0:
+        return rows, cols
+    order = np.argsort(cost[rows, cols], kind="stable")
+    row_used = np.zeros(cost.shape[0], dtype=bool)
+    col_used = np.zeros(cost.shape[1], dtype=bool)
+    keep = []
+    # only gated candidates are walked, a handful per detection
+    for k in order.tolist():
+        r, c = rows[k], cols[k]
+        if not row_used[r] and not col_used[c]:
+            row_used[r] = col_used[c] = True
+            keep.append(k)
+    return rows[keep], cols[keep]
+
+
+class ObjectTracker:
+    """
+    Associates the detections of consecutive radar scans into tracks with
+    persistent ids, independent of the object slot the radar reports them in.
+    Tracks are predicted to the scan time, gated by distance and assigned
+    greedily by nearest distance, then smoothed with an alpha-beta filter.
+    Everything but the assignment walk is vectorized over the track table.
+    update() runs on the RX side once per completed scan, see attach().
+    """
+
+    def __init__(
+        self,
+        capacity: int = track_capacity,
+        gate: float = track_gate_distance,
+        alpha: float = track_alpha,
+        beta: float = track_beta,
+        max_misses: int = track_max_misses,
+        time_budget: float = track_time_budget,
+    ):
+        self.tracks = np.zeros(capacity, dtype=TRACK_DTYPE)
+        self.gate = gate
+        self.alpha = alpha
+        self.beta = beta
+        self.max_misses = max_misses
+        self.time_budget = time_budget
+        # Track id per record index of the last scan, -1 for no track
+        self.record_tracks = np.full(0, -1, dtype=np.int64)
+        # (publish_seq, record_tracks) of the last scan, swapped as one for
+        # readers on other threads
+        self.published: Tuple[int, np.ndarray] = (0, self.record_tracks)
+        self.next_track_id = 1
+        self.scan_time = 0.0
+        self.last_duration = 0.0
+        self.budget_overruns = 0
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.tracks["active"]))
+
+    def active_tracks(self) -> np.ndarray:
+        """Copy of the active track records"""
+        return self.tracks[self.tracks["active"]]
+
+    def attach(self, view) -> None:
+        """Track every scan view publishes"""
+        view.publish_listeners.append(self.update)
+
+    def track_ids(self, publish_seq: int) -> Optional[np.ndarray]:
+        """Track id per record of the scan publish_seq, None if not tracked"""
+        seq, record_tracks = self.published
+        return record_tracks if seq == publish_seq else None
+
+    def update(self, records: np.ndarray, scan_time: float, publish_seq: int) -> None:
+        """Feed one complete scan"""
+        start = time.perf_counter()
+        # a new array per scan, readers may still hold the previous one
+        self.record_tracks = np.full(len(records), -1, dtype=np.int64)
+        detections = np.flatnonzero(
+            (records["object_id"] != INVALID_OBJECT_ID)
+            & (records["data_conf"] >= track_min_data_conf)
+        )
+        det_lat = records["lat_pos"][detections]
+        det_lgt = records["lgt_pos"][detections]
+
+        dt = scan_time - self.scan_time if self.scan_time else 0.0
+        self.scan_time = scan_time
+        tracks = self.tracks
+        slots = np.flatnonzero(tracks["active"])
+
+        # Predict the tracks to this scan
+        pred_lat = tracks["lat_pos"][slots] + tracks["lat_velocity"][slots] * dt
+        pred_lgt = tracks["lgt_pos"][slots] + tracks["lgt_velocity"][slots] * dt
+
+        # (tracks, detections) distances, gated and assigned nearest first
+        cost = np.hypot(
+            det_lat[None, :] - pred_lat[:, None], det_lgt[None, :] - pred_lgt[:, None]
+        )
+        track_idx, det_idx = greedy_assignment(cost, self.gate)
+
+        # Alpha-beta correction of the matched tracks
+        matched = slots[track_idx]
+        res_lat = det_lat[det_idx] - pred_lat[track_idx]
+        res_lgt = det_lgt[det_idx] - pred_lgt[track_idx]
+        tracks["lat_pos"][matched] = pred_lat[track_idx] + self.alpha * res_lat
+        tracks["lgt_pos"][matched] = pred_lgt[track_idx] + self.alpha * res_lgt
+        if dt > 0.0:
+            tracks["lat_velocity"][matched] += self.beta / dt * res_lat
+            tracks["lgt_velocity"][matched] += self.beta / dt * res_lgt
+        det_records = records[detections[det_idx]]
+        tracks["object_id"][matched] = det_records["object_id"]
+        tracks["class_type"][matched] = det_records["class_type"]
+        tracks["hits"][matched] += 1
+        tracks["misses"][matched] = 0
+        tracks["confidence"][matched] += CONFIDENCE_GAIN * (
+            1.0 - tracks["confidence"][matched]
+        )
+        self.record_tracks[detections[det_idx]] = tracks["track_id"][matched]
+
+        # Coast the unmatched tracks on their prediction, drop the stale ones
+        missed_mask = np.ones(len(slots), dtype=bool)
+        missed_mask[track_idx] = False
+        missed = slots[missed_mask]
+        tracks["lat_pos"][missed] = pred_lat[missed_mask]
+        tracks["lgt_pos"][missed] = pred_lgt[missed_mask]
+        tracks["misses"][missed] += 1
+        tracks["confidence"][missed] *= 1.0 - CONFIDENCE_GAIN
+        tracks["age"][slots] += 1
+        tracks["active"][missed[tracks["misses"][missed] > self.max_misses]] = False
+
+        # Start tracks for the unmatched detections while there is room
+        new_mask = np.ones(len(detections), dtype=bool)
+        new_mask[det_idx] = False
+        new_records = detections[new_mask]
+        free = np.flatnonzero(~tracks["active"])[: len(new_records)]
+        new_records = new_records[: len(free)]
+        if len(free):
+            source = records[new_records]
+            track_ids = np.arange(self.next_track_id, self.next_track_id + len(free))
+            self.next_track_id += len(free)
+            tracks[free] = 0
+            tracks["track_id"][free] = track_ids
+            tracks["object_id"][free] = source["object_id"]
+            tracks["class_type"][free] = source["class_type"]
+            tracks["hits"][free] = 1
+            tracks["confidence"][free] = CONFIDENCE_GAIN
+            tracks["lat_pos"][free] = source["lat_pos"]
+            tracks["lgt_pos"][free] = source["lgt_pos"]
+            # the radar's own velocity starts the filter
+            tracks["lat_velocity"][free] = (
+                source["lat_velocity"] * motion_prediction_scale
+            )
+            tracks["lgt_velocity"][free] = (
+                source["lgt_velocity"] * motion_prediction_scale
+            )
+            tracks["active"][free] = True
+            self.record_tracks[new_records] = track_ids
+
+        self.published = (publish_seq, self.record_tracks)
+        self.last_duration = time.perf_counter() - start
+        if self.last_duration > self.time_budget:
+            self.budget_overruns += 1
+
+    def format_stats(self) -> str:
+        return (
+            f"Tracker: {len(self)} active tracks, {self.next_track_id - 1} created, "
+            f"{self.budget_overruns} scans over the {self.time_budget * 1000:g} ms budget"
+        )
+
+
+# Tracks of the published radar scans
+object_tracker = ObjectTracker()
@@ -1,8 +1,12 @@
+import bisect
 import can
 import e2e.p05
+import heapq
+import itertools
+import threading
 import time
 from defines import *
-from typing import Callable
+from typing import Callable, Dict, List, Optional, Tuple
 
 # Global counter for sync time messages
 sync_time_counter = 15  # Starting value matching trace data
@@ -10,10 +14,6 @@ sync_time_counter = 15  # Starting value matching trace data
 # Global reference time for seconds synchronization - set when first called
 sync_epoch_time = None
 
-# Global variables to track timing deltas
-last_timesync_send_time = None
-last_can0_tx_send_time = None
-
 # Getting the current date and time
 ################# TX ################
 # 0x200
@@ -30,12 +30,12 @@ PID_CARCONFIG = 0x210
 data_210_tx_msg = bytearray(b"\x00\x00\x00\x09\x00\x00\x00\x00\x01\x03\x00\x00")
 length_210 = len(data_210_tx_msg)
 # 0x210 CarConfig
-data_210_tx_msg_carConfig = bytearray(b"\x00\x00\x00\x09\x00")
+data_210_tx_msg_carConfig = data_210_tx_msg[:5]
 length_210_carConfig = len(data_210_tx_msg_carConfig) - 2
 offset_210_carConfig = 0
 data_id_210_carConfig = 0xA35
 # 0x210 PowerMode
-data_210_tx_msg_PowerMode = bytearray(b"\x00\x00\x00\x01")
+data_210_tx_msg_PowerMode = data_210_tx_msg[5:]
 length_210_PowerMode = len(data_210_tx_msg_PowerMode) - 2
 offset_210_PowerMode = 0
 data_id_210_PowerMode = 0xD0B
@@ -63,9 +63,6 @@ length_240 = len(data_240_tx_msg) - 2
 offset_240 = 0
 data_id_240 = 0xB7A
 
-data_210_tx_msg_carConfig = data_210_tx_msg[:5]
-data_210_tx_msg_PowerMode = data_210_tx_msg[5:]
-
 # 0x702_10
 PID_TS = 0x702
 data_702_seconds_tx_msg = bytearray(b"\x10\x00\x00\x00\x00\x00\x00\x00")
@@ -78,167 +75,214 @@ length_702_millis = len(data_702_millis_tx_msg)
 offset_702_millis = 0
 
 
-##############################################################
-def process_200(can_bus: can.BusABC, ts):
-    # Send Vehicle motion state
-    e2e.p05.e2e_p05_protect(
-        data=data_200_tx_msg,
-        length=length_200,
-        offset=offset_200,
-        data_id=data_id_200,
-        increment_counter=True,
-    )
+# E2E P05 counters are 8 bit, the protected payloads repeat every 256 cycles
+E2E_P05_COUNTER_CYCLE = 256
+
+# E2E protected sections (buffer, length, offset, data id) of the 60ms
+# messages in send order, a frame is the concatenation of its sections
+CAN0_TX_SECTIONS = {
+    PID_VEHMOTIONSTATE: [(data_200_tx_msg, length_200, offset_200, data_id_200)],
+    PID_CARCONFIG: [
+        (
+            data_210_tx_msg_carConfig,
+            length_210_carConfig,
+            offset_210_carConfig,
+            data_id_210_carConfig,
+        ),
+        (
+            data_210_tx_msg_PowerMode,
+            length_210_PowerMode,
+            offset_210_PowerMode,
+            data_id_210_PowerMode,
+        ),
+    ],
+    PID_GLOBALSNAPSHOT: [(data_220_tx_msg, length_220, offset_220, data_id_220)],
+    PID_VEHMODES: [(data_230_tx_msg, length_230, offset_230, data_id_230)],
+    PID_FUNCINFO: [(data_240_tx_msg, length_240, offset_240, data_id_240)],
+}
+
+# Messages whose payload only changes by the E2E counter
+STATIC_TX_MESSAGES = (PID_CARCONFIG, PID_GLOBALSNAPSHOT, PID_VEHMODES, PID_FUNCINFO)
+
+
+def e2e_p05_cycle(
+    data: bytearray, length: int, offset: int, data_id: int
+) -> List[bytes]:
+    """
+    The protected payloads of the next E2E_P05_COUNTER_CYCLE sends of data,
+    counter advancing by one each. data itself is left untouched.
+    """
+    work = bytearray(data)
+    payloads = []
+    for _ in range(E2E_P05_COUNTER_CYCLE):
+        e2e.p05.e2e_p05_protect(
+            data=work,
+            length=length,
+            offset=offset,
+            data_id=data_id,
+            increment_counter=True,
+        )
+        payloads.append(bytes(work))
+    return payloads
 
-    msg_200 = can.Message(
-        arbitration_id=PID_VEHMOTIONSTATE,
-        data=data_200_tx_msg,
-        is_extended_id=False,
-        dlc=len(data_200_tx_msg),
-        is_fd=True,
-        timestamp=ts,
-    )
-    try:
-        can_bus.send(msg=msg_200)
-        # print("Tx:  {}".format(msg_200))
-    except can.CanError:
-        print("Message NOT sent")
 
+def protected_cycle(sections) -> List[Tuple[bytes, ...]]:
+    """Per send of the counter cycle, the protected payload of every section"""
+    return list(zip(*(e2e_p05_cycle(*section) for section in sections)))
 
-##############################################################
-def process_210(can_bus: can.BusABC, ts):
-    # Send a CarConfig
-    e2e.p05.e2e_p05_protect(
-        data=data_210_tx_msg_carConfig,
-        length=length_210_carConfig,
-        data_id=data_id_210_carConfig,
-        offset=offset_210_carConfig,
-        increment_counter=True,
-    )
-    e2e.p05.e2e_p05_protect(
-        data=data_210_tx_msg_PowerMode,
-        length=length_210_PowerMode,
-        data_id=data_id_210_PowerMode,
-        offset=offset_210_PowerMode,
-        increment_counter=True,
-    )
-    data_210_tx_msg = data_210_tx_msg_carConfig + data_210_tx_msg_PowerMode
 
-    msg_210 = can.Message(
-        arbitration_id=PID_CARCONFIG,
-        data=data_210_tx_msg,
-        is_extended_id=False,
-        dlc=len(data_210_tx_msg),
-        is_fd=True,
-        timestamp=ts,
-    )
-    try:
-        can_bus.send(msg=msg_210)
-        # print("Tx:  {}".format(msg_210))
-    except can.CanError:
-        print("Message NOT sent")
+class E2EPayloadCache:
+    """
+    The whole protected counter cycle of a static message, computed once
+    from its buffers, which stay the unprotected template. next() returns
+    the frame of the next send. When the buffer bytes are changed the cycle
+    is rebuilt, keeping the position in it so the counter continues.
+    """
 
+    def __init__(self, sections):
+        self.sections = sections
+        self.buffers = [section[0] for section in sections]
+        self.frames: Optional[List[bytes]] = None
+        self.index = 0
+        # Buffer contents the cycle was built from
+        self.snapshot: List[bytes] = []
 
-##############################################################
-def process_220(can_bus: can.BusABC, ts):
-    # Send Global Snapshot
-    e2e.p05.e2e_p05_protect(
-        data=data_220_tx_msg,
-        length=length_220,
-        offset=offset_220,
-        data_id=data_id_220,
-        increment_counter=True,
-    )
+    def invalidate(self) -> None:
+        self.frames = None
 
-    msg_220 = can.Message(
-        arbitration_id=PID_GLOBALSNAPSHOT,
-        data=data_220_tx_msg,
-        is_extended_id=False,
-        dlc=len(data_220_tx_msg),
-        is_fd=True,
-        timestamp=ts,
-    )
-    try:
-        can_bus.send(msg=msg_220)
-        # print("Tx:  {}".format(msg_220))
-    except can.CanError as e:
-        print("Message NOT sent", e)
+    def build(self) -> None:
+        self.snapshot = [bytes(buffer) for buffer in self.buffers]
+        self.frames = [b"".join(parts) for parts in protected_cycle(self.sections)]
 
+    def changed(self) -> bool:
+        return self.buffers != self.snapshot
+
+    def next(self) -> bytes:
+        if self.frames is None or self.changed():
+            self.build()
+        index = self.index
+        self.index = (index + 1) % E2E_P05_COUNTER_CYCLE
+        return self.frames[index]
 
-##############################################################
-def process_230(can_bus: can.BusABC, ts):
-    # Send a VehMode
-    e2e.p05.e2e_p05_protect(
-        data=data_230_tx_msg,
-        length=length_230,
-        offset=offset_230,
-        data_id=data_id_230,
-        increment_counter=True,
-    )
 
-    msg_230 = can.Message(
-        timestamp=ts,
-        arbitration_id=PID_VEHMODES,
+# Precomputed payloads of the static 60ms messages
+tx_payload_caches: Dict[int, E2EPayloadCache] = {
+    arbitration_id: E2EPayloadCache(CAN0_TX_SECTIONS[arbitration_id])
+    for arbitration_id in STATIC_TX_MESSAGES
+}
+
+
+def _tx_message(arbitration_id: int, data: bytearray, dlc=None) -> can.Message:
+    # can.Message keeps a bytearray by reference, no copy
+    return can.Message(
+        arbitration_id=arbitration_id,
+        data=data,
         is_extended_id=False,
-        dlc=len(data_230_tx_msg),
-        data=data_230_tx_msg,
+        dlc=len(data) if dlc is None else dlc,
         is_fd=True,
     )
+
+
+# Long-lived TX messages, their data is updated in place every cycle
+msg_200 = _tx_message(PID_VEHMOTIONSTATE, data_200_tx_msg)
+msg_210 = _tx_message(
+    PID_CARCONFIG,
+    bytearray(len(data_210_tx_msg_carConfig) + len(data_210_tx_msg_PowerMode)),
+)
+msg_220 = _tx_message(PID_GLOBALSNAPSHOT, bytearray(len(data_220_tx_msg)))
+msg_230 = _tx_message(PID_VEHMODES, bytearray(len(data_230_tx_msg)))
+msg_240 = _tx_message(PID_FUNCINFO, bytearray(len(data_240_tx_msg)))
+msg_702_10 = _tx_message(PID_TS, data_702_seconds_tx_msg, dlc=8)
+msg_702_18 = _tx_message(PID_TS, data_702_millis_tx_msg, dlc=8)
+
+
+def send_frame(can_bus: can.BusABC, msg: can.Message) -> None:
     try:
-        can_bus.send(msg=msg_230)
-        # print("Tx:  {}".format(msg_230))
+        can_bus.send(msg=msg)
     except can.CanError as e:
         print("Message NOT sent", e)
 
 
+def send_batch(can_bus: can.BusABC, messages) -> None:
+    """Send frames prepared beforehand back to back, no work between them"""
+    for msg in messages:
+        send_frame(can_bus, msg)
+
+
+def _next_static_frame(msg: can.Message, ts) -> can.Message:
+    frame = tx_payload_caches[msg.arbitration_id].next()
+    msg.data[:] = frame
+    msg.dlc = len(frame)
+    msg.timestamp = ts
+    return msg
+
+
 ##############################################################
-def process_240(can_bus: can.BusABC, ts):
-    # Send Func info
+def prepare_200(ts) -> can.Message:
+    # Vehicle motion state, protected in place in the message data
     e2e.p05.e2e_p05_protect(
-        data=data_240_tx_msg,
-        length=length_240,
-        offset=offset_240,
-        data_id=data_id_240,
+        data=data_200_tx_msg,
+        length=length_200,
+        offset=offset_200,
+        data_id=data_id_200,
         increment_counter=True,
     )
+    msg_200.timestamp = ts
+    return msg_200
 
-    msg_240 = can.Message(
-        arbitration_id=PID_FUNCINFO,
-        data=data_240_tx_msg,
-        is_extended_id=False,
-        dlc=len(data_240_tx_msg),
-        is_fd=True,
-        timestamp=ts,
-    )
-    try:
-        can_bus.send(msg=msg_240)
-        # print("Tx:  {}".format(msg_240))
-    except can.CanError:
-        print("Message NOT sent")
 
+def prepare_210(ts) -> can.Message:
+    # CarConfig + PowerMode, protected payload from the precomputed counter cycle
+    return _next_static_frame(msg_210, ts)
 
-# process the TX messages to radar
-def process_CAN0_tx(can_bus: can.BusABC):
-    global last_can0_tx_send_time
 
+def prepare_220(ts) -> can.Message:
+    # Global Snapshot
+    return _next_static_frame(msg_220, ts)
+
+
+def prepare_230(ts) -> can.Message:
+    # VehMode
+    return _next_static_frame(msg_230, ts)
+
+
+def prepare_240(ts) -> can.Message:
+    # Func info
+    return _next_static_frame(msg_240, ts)
+
+
+# Preparation of the 60ms messages in send order
+CAN0_TX_PREPARE: Dict[int, Callable[[float], can.Message]] = {
+    PID_VEHMOTIONSTATE: prepare_200,
+    PID_CARCONFIG: prepare_210,
+    PID_GLOBALSNAPSHOT: prepare_220,
+    PID_VEHMODES: prepare_230,
+    PID_FUNCINFO: prepare_240,
+}
+
+
+# process the TX messages to radar
+def process_CAN0_tx(can_bus: can.BusABC, tx_ids=tuple(CAN0_TX_PREPARE)):
     if can_bus is None:
         print("CAN bus is not initialized.")
         return
-    """
-    # Calculate delta time since last send
-    current_send_time = time.time()
-    if last_can0_tx_send_time is not None:
-        delta_ms = (current_send_time - last_can0_tx_send_time) * 1000
-        print(f"CAN0_TX Delta: {delta_ms:.2f} ms")
-    last_can0_tx_send_time = current_send_time
-    """
+    # Send intervals are measured by the TX scheduler, see tx_scheduler.metrics()
     # Get the current time in milliseconds
     current_time = time.time() * 1000  # Convert to milliseconds
 
-    process_200(can_bus, current_time)
-    process_210(can_bus, current_time)
-    process_220(can_bus, current_time)
-    process_230(can_bus, current_time)
-    process_240(can_bus, current_time)
+    # All frames of the cycle are prepared first, then sent back to back.
+    # A message that fails to prepare does not hold back the others, its
+    # error is raised after the batch went out so the scheduler counts it.
+    batch = []
+    error = None
+    for arbitration_id in tx_ids:
+        try:
+            batch.append(CAN0_TX_PREPARE[arbitration_id](current_time))
+        except ValueError as e:
+            error = ValueError(f"0x{arbitration_id:03X}: {e}")
+    send_batch(can_bus, batch)
+    if error is not None:
+        raise error
 
 
 ##############################################################
@@ -277,20 +321,8 @@ def process_702_10(can_bus: can.BusABC, ts, current_time_seconds):
     )
 
     # print("CAN 702 SYNC: Seq={:02x}, Seconds={}, Data={}".format(sequence_counter, seconds_32bit, data_702_seconds_tx_msg.hex()))
-    # Send Func info
-    msg_702_10 = can.Message(
-        arbitration_id=PID_TS,
-        data=data_702_seconds_tx_msg,
-        is_extended_id=False,
-        dlc=8,  # len(data_702_seconds_tx_msg),
-        is_fd=True,
-        timestamp=ts,
-    )
-    try:
-        can_bus.send(msg=msg_702_10)
-        # print("Tx:  {}".format(msg_702_10))
-    except can.CanError:
-        print("Message NOT sent")
+    msg_702_10.timestamp = ts
+    send_frame(can_bus, msg_702_10)
 
 
 # send milis - FUP not CRC secured message format
@@ -322,33 +354,12 @@ def process_702_18(can_bus: can.BusABC, ts, current_time_ns):
     )
 
     # print("CAN 702: Seq={:02x}, NS={}, Data={}".format(sequence_counter, nanoseconds_in_second, data_702_millis_tx_msg.hex()))
-    # Send Func info
-    msg_702_18 = can.Message(
-        arbitration_id=PID_TS,
-        data=data_702_millis_tx_msg,
-        is_extended_id=False,
-        dlc=8,  # len(data_702_millis_tx_msg),
-        is_fd=True,
-        timestamp=ts,
-    )
-    try:
-        can_bus.send(msg=msg_702_18)
-        # print("Tx:  {}".format(msg_702_18))
-    except can.CanError:
-        print("Message NOT sent")
+    msg_702_18.timestamp = ts
+    send_frame(can_bus, msg_702_18)
 
 
 def periodic_TimeSync_125ms_task(can_bus: can.BusABC):
-    """
-    global last_timesync_send_time
-
-    # Calculate delta time since last send
-    current_send_time = time.time()
-    if last_timesync_send_time is not None:
-        delta_ms = (current_send_time - last_timesync_send_time) * 1000
-        print(f"TimeSync_125ms Delta: {delta_ms:.2f} ms")
-    last_timesync_send_time = current_send_time
-    """
+    # Send intervals are measured by the TX scheduler, see tx_scheduler.metrics()
     # Get the current time
     current_time = time.time()
 
@@ -363,43 +374,267 @@ def periodic_TimeSync_125ms_task(can_bus: can.BusABC):
 ##############################################################
 
 
-def periodic_task(interval_ms: float, task: Callable, stop_event, *args, **kwargs):
-    interval_sec = interval_ms / 1000.0
-    next_run_time = time.monotonic()
-    while not stop_event.is_set():
-        current_time = time.monotonic()
-        if current_time >= next_run_time:
-            task(*args, **kwargs)
-            next_run_time += interval_sec
-        else:
-            time_to_sleep = next_run_time - current_time
-            if time_to_sleep > 0.001:
-                time.sleep(time_to_sleep)
-
-
-def process_CAN0_tx_60ms_wrapper(interval_ms: float, stop_event, can_bus_CAN1):
-    """Wrapper function for TX process using existing CAN bus"""
-    try:
-        if can_bus_CAN1 is None:
-            print("CAN bus not provided to TX process")
-            return
-
-        # Run the periodic TX task every 60ms
-        periodic_task(interval_ms, process_CAN0_tx, stop_event, can_bus_CAN1)
-
-    except Exception as e:
-        print(f"TX process error: {e}")
-
+class TxOffload:
+    """
+    Hands the 60ms messages to the bus' own cyclic sender, the kernel
+    broadcast manager (BCM) on socketcan. Each message gets its complete
+    E2E counter cycle as one frame sequence, which the kernel sends one
+    frame per period, so no Python thread is involved in their cadence.
+    Python only pushes a new cycle through modify_data when a payload
+    changes, see refresh().
+    """
 
-def periodic_CAN0_tx_TimeSync_125ms_wrapper(
-    interval_ms: float, stop_event, can_bus_CAN1
-):
-    """Wrapper function for 125ms periodic process"""
-    try:
-        # Run the periodic task every 125ms
-        periodic_task(
-            interval_ms, periodic_TimeSync_125ms_task, stop_event, can_bus_CAN1
-        )
+    def __init__(self, can_bus: can.BusABC, interval_ms: float = 60):
+        self.can_bus = can_bus
+        self.period = interval_ms / 1000.0
+        self.tasks: Dict[int, can.broadcastmanager.CyclicSendTaskABC] = {}
+        # Buffer contents each loaded cycle was built from
+        self.snapshots: Dict[int, List[bytes]] = {}
+
+    def start(self) -> None:
+        for arbitration_id in CAN0_TX_SECTIONS:
+            try:
+                self.update(arbitration_id)
+            except (ValueError, can.CanError) as e:
+                print(f"TX offload of 0x{arbitration_id:03X} failed: {e}")
+
+    def update(self, arbitration_id: int) -> None:
+        """(Re)load the protected cycle of a message after its payload changed"""
+        sections = CAN0_TX_SECTIONS[arbitration_id]
+        snapshot = [bytes(section[0]) for section in sections]
+        messages = [
+            can.Message(
+                arbitration_id=arbitration_id,
+                data=b"".join(parts),
+                is_extended_id=False,
+                dlc=sum(map(len, parts)),
+                is_fd=True,
+            )
+            for parts in protected_cycle(sections)
+        ]
+        task = self.tasks.get(arbitration_id)
+        if task is None:
+            self.tasks[arbitration_id] = self.can_bus.send_periodic(
+                messages, self.period
+            )
+        else:
+            task.modify_data(messages)
+        self.snapshots[arbitration_id] = snapshot
+
+    def refresh(self) -> None:
+        """Reload the cycles of the loaded messages whose buffers changed"""
+        errors = []
+        for arbitration_id, snapshot in self.snapshots.items():
+            buffers = [section[0] for section in CAN0_TX_SECTIONS[arbitration_id]]
+            if buffers != snapshot:
+                try:
+                    self.update(arbitration_id)
+                except (ValueError, can.CanError) as e:
+                    # the old cycle keeps running, retried on the next refresh
+                    errors.append(f"0x{arbitration_id:03X}: {e}")
+        if errors:
+            raise can.CanError("TX offload refresh failed: " + "; ".join(errors))
+
+    def stop(self) -> None:
+        for task in self.tasks.values():
+            task.stop()
+        self.tasks.clear()
+        self.snapshots.clear()
+
+
+# Upper edges (ms) of the send lateness histogram buckets, the last bucket is open
+JITTER_BUCKETS_MS = (0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0)
+
+
+class TxJitterStats:
+    """Send-time statistics of one cyclic TX task"""
+
+    def __init__(self, period: float):
+        self.period = period
+        # Lateness of each send against its absolute deadline
+        self.histogram = [0] * (len(JITTER_BUCKETS_MS) + 1)
+        self.sent = 0
+        self.skipped = 0
+        self.errors = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+        # Interval between consecutive sends
+        self.last_send: Optional[float] = None
+        self.last_interval = 0.0
+        self.min_interval = float("inf")
+        self.max_interval = 0.0
+
+    def record(self, deadline: float, sent_at: float) -> None:
+        lateness = sent_at - deadline
+        self.histogram[bisect.bisect_left(JITTER_BUCKETS_MS, lateness * 1000.0)] += 1
+        self.sent += 1
+        self.total_lateness += lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+        if self.last_send is not None:
+            interval = sent_at - self.last_send
+            self.last_interval = interval
+            self.min_interval = min(self.min_interval, interval)
+            self.max_interval = max(self.max_interval, interval)
+        self.last_send = sent_at
+
+    def snapshot(self) -> dict:
+        """Statistics in milliseconds"""
+        labels = [f"<={edge:g}" for edge in JITTER_BUCKETS_MS] + [
+            f">{JITTER_BUCKETS_MS[-1]:g}"
+        ]
+        return {
+            "period_ms": self.period * 1000.0,
+            "sent": self.sent,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "mean_lateness_ms": (
+                self.total_lateness / self.sent * 1000.0 if self.sent else 0.0
+            ),
+            "max_lateness_ms": self.max_lateness * 1000.0,
+            "last_interval_ms": self.last_interval * 1000.0,
+            "min_interval_ms": self.min_interval * 1000.0 if self.sent > 1 else 0.0,
+            "max_interval_ms": self.max_interval * 1000.0,
+            "lateness_histogram_ms": dict(zip(labels, self.histogram)),
+        }
+
+
+class CyclicTxTask:
+    """One cyclic TX job of the scheduler"""
+
+    def __init__(self, name: str, period: float, task: Callable, args: tuple):
+        self.name = name
+        self.period = period
+        self.task = task
+        self.args = args
+        self.stats = TxJitterStats(period)
+        # Last error message, repeats of it are only counted
+        self.last_error: Optional[str] = None
+
+
+class TxScheduler:
+    """
+    Runs all cyclic TX tasks on one thread against absolute deadlines
+    (start + n * period), so send times do not drift with the task run time.
+    Deadlines are kept in a heap, the thread sleeps until the earliest one.
+    When a stall makes several deadlines pass, "skip" sends once for the
+    latest of them and "catch_up" sends up to max_catch_up of them.
+    A task that raises is counted as an error and stays scheduled, its
+    error is printed when it differs from the previous one.
+    """
 
-    except Exception as e:
-        print(f"125ms periodic process error: {e}")
+    def __init__(
+        self, policy: str = tx_overrun_policy, max_catch_up: int = tx_max_catch_up
+    ):
+        if policy not in ("skip", "catch_up"):
+            raise ValueError(f"Unknown TX overrun policy: {policy}")
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+        self.tasks: Dict[str, CyclicTxTask] = {}
+        self._heap: List[Tuple[float, int, CyclicTxTask]] = []
+        self._order = itertools.count()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Messages whose cadence is owned by the bus, stopped with the scheduler
+        self.offload: Optional[TxOffload] = None
+
+    def add(
+        self, name: str, interval_ms: float, task: Callable, *args, offset_ms=0.0
+    ) -> CyclicTxTask:
+        """Schedule task(*args) every interval_ms, call before start()"""
+        cyclic = CyclicTxTask(name, interval_ms / 1000.0, task, args)
+        self.tasks[name] = cyclic
+        deadline = time.monotonic() + offset_ms / 1000.0
+        heapq.heappush(self._heap, (deadline, next(self._order), cyclic))
+        return cyclic
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self.run, args=(self._stop_event,), name="tx", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 1.0) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self.offload is not None:
+            self.offload.stop()
+
+    def run(self, stop_event: threading.Event) -> None:
+        heap = self._heap
+        while heap and not stop_event.is_set():
+            deadline, order, cyclic = heap[0]
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                # wakes up early only to stop
+                stop_event.wait(remaining)
+                continue
+            heapq.heappop(heap)
+
+            cyclic.stats.record(deadline, time.monotonic())
+            try:
+                cyclic.task(*cyclic.args)
+            except Exception as e:
+                # counted, the task keeps its schedule
+                cyclic.stats.errors += 1
+                if str(e) != cyclic.last_error:
+                    cyclic.last_error = str(e)
+                    print(f"TX task {cyclic.name} error: {e}")
+
+            period = cyclic.period
+            next_deadline = deadline + period
+            missed = int((time.monotonic() - next_deadline) // period) + 1
+            if missed > 1:
+                # several deadlines have passed: skip keeps only the latest,
+                # catch_up runs up to max_catch_up of them back to back
+                allowed = self.max_catch_up if self.policy == "catch_up" else 1
+                skip = max(missed - max(allowed, 1), 0)
+                cyclic.stats.skipped += skip
+                next_deadline += skip * period
+            heapq.heappush(heap, (next_deadline, order, cyclic))
+
+    def metrics(self) -> Dict[str, dict]:
+        """Send-time statistics per task, see TxJitterStats.snapshot()"""
+        return {name: cyclic.stats.snapshot() for name, cyclic in self.tasks.items()}
+
+    def format_metrics(self) -> str:
+        lines = []
+        for name, stats in self.metrics().items():
+            lines.append(
+                f"{name}: sent {stats['sent']}, skipped {stats['skipped']}, "
+                f"errors {stats['errors']}, interval "
+                f"{stats['min_interval_ms']:.2f}..{stats['max_interval_ms']:.2f} ms, "
+                f"lateness mean {stats['mean_lateness_ms']:.3f} "
+                f"max {stats['max_lateness_ms']:.3f} ms"
+            )
+        if self.offload is not None:
+            offloaded = ", ".join(f"0x{i:03X}" for i in self.offload.tasks)
+            lines.append(f"offloaded to the bus: {offloaded or 'none'}")
+        return "\n".join(lines)
+
+
+def start_tx_scheduler(can_bus_CAN0, can_bus_CAN1) -> TxScheduler:
+    """Start the cyclic radar TX: 0x200-0x240 every 60ms, 0x702 every 125ms"""
+    scheduler = TxScheduler()
+    if tx_offload_mode:
+        scheduler.offload = TxOffload(can_bus_CAN0, 60)
+        scheduler.offload.start()
+        # Only the payload changes are Python's, checked once per cycle
+        scheduler.add("0x200-0x240 offload refresh", 60, scheduler.offload.refresh)
+    else:
+        # Counter cycles of the static messages are ready before the first send,
+        # a message whose cycle cannot be built is left out instead of failing
+        # again every cycle
+        tx_ids = list(CAN0_TX_PREPARE)
+        for arbitration_id, cache in tx_payload_caches.items():
+            try:
+                cache.build()
+            except ValueError as e:
+                print(f"TX of 0x{arbitration_id:03X} disabled: {e}")
+                tx_ids.remove(arbitration_id)
+        scheduler.add("0x200-0x240 60ms", 60, process_CAN0_tx, can_bus_CAN0, tx_ids)
+    # Sync frames carry the time they are sent at, they stay on the scheduler
+    scheduler.add("0x702 125ms", 125, periodic_TimeSync_125ms_task, can_bus_CAN1)
+    scheduler.start()
+    return scheduler
@@ -0,0 +1,203 @@
+import random
+import numpy as np
+import pytest
+from cantools.database import Database, conversion
+from cantools.database.can import Message, Signal
+import rx
+
+# (bits, signed, scale, offset) of the object signals, in frame order
+OBJECT_LAYOUT = (
+    (4, False, 1, 0),  # class
+    (7, False, 1, 0),  # data_conf
+    (8, False, 0.2, 0),  # data_len
+    (8, False, 0.1, 0),  # data_width
+    (12, True, 0.01, 0),  # heading_angle
+    (10, True, 0.05, 0),  # lat_acc
+    (14, True, 0.02, 0),  # lat_pos
+    (12, True, 0.05, 0),  # lat_velocity
+    (10, True, 0.05, 0),  # lgt_acc
+    (15, False, 0.02, -100.0),  # lgt_pos
+    (12, True, 0.05, 0),  # lgt_velocity
+    (4, False, 1, 0),  # model_info
+    (6, False, 1, 0),  # quality
+)
+
+
+def _signal(name, start, bits, signed=False, scale=1, offset=0, byte_order=None):
+    if byte_order == "big_endian":
+        # start counts bits from the first byte's MSB, the DBC wants the
+        # sawtooth number of the signal's MSB
+        start = 8 * (start // 8) + 7 - start % 8
+    return Signal(
+        name,
+        start,
+        bits,
+        byte_order=byte_order or "little_endian",
+        is_signed=signed,
+        conversion=conversion.BaseConversion.factory(scale=scale, offset=offset),
+    )
+
+
+def build_radar_dbc(byte_order="little_endian") -> Database:
+    """Object-list frames of OBJECT_CONFIG behind a 3 byte E2E header"""
+    messages = []
+    for entry in rx.object_attribute_list:
+        signals = [
+            _signal(entry.scan_id_signal, 24, 8, byte_order=byte_order),
+            _signal(entry.msg_counter_signal, 32, 8, byte_order=byte_order),
+        ]
+        start = 40
+        for prop in (
+            entry.msg_obj_prop.first_obj_prop,
+            entry.msg_obj_prop.second_obj_prop,
+        ):
+            for field, (bits, signed, scale, offset) in zip(
+                rx.OBJECT_SIGNAL_FIELDS, OBJECT_LAYOUT
+            ):
+                signal_name = getattr(prop, field)
+                signals.append(
+                    _signal(signal_name, start, bits, signed, scale, offset, byte_order)
+                )
+                start += bits
+        name = f"{entry.msg_name}_{entry.arbitration_id:X}"
+        messages.append(Message(entry.arbitration_id, name, 64, signals, is_fd=True))
+    return Database(messages)
+
+
+def random_frame(dbc: Database, can_id: int, scan_id: int, rng) -> bytes:
+    message = dbc.get_message_by_frame_id(can_id)
+    values = {}
+    for signal in message.signals:
+        low = -(1 << (signal.length - 1)) if signal.is_signed else 0
+        high = (1 << (signal.length - 1 if signal.is_signed else signal.length)) - 1
+        values[signal.name] = signal.conversion.raw_to_scaled(rng.randint(low, high))
+    values[message.signals[0].name] = scan_id
+    return message.encode(values, scaling=True, strict=False)
+
+
+def expected_objects(dbc: Database, frames) -> np.ndarray:
+    """Object records of a scan decoded the generic way, through cantools"""
+    expected = rx.new_object_records()
+    for entry in rx.object_attribute_list:
+        decoded = dbc.decode_message(entry.arbitration_id, frames[entry.arbitration_id])
+        index = entry.arbitration_id - rx.object_attribute_list[0].arbitration_id
+        for slot, prop in (
+            (index, entry.msg_obj_prop.first_obj_prop),
+            (index + 1, entry.msg_obj_prop.second_obj_prop),
+        ):
+            expected[slot] = (prop.object_id,) + tuple(
+                decoded[getattr(prop, field)] for field in rx.OBJECT_SIGNAL_FIELDS
+            )
+    return expected
+
+
+@pytest.fixture
+def radar_dbc():
+    return build_radar_dbc()
+
+
+def test_scan_decode_matches_cantools(radar_dbc):
+    rng = random.Random(1)
+    batch = rx.ScanBatchDecoder(rx.compile_object_decoders(radar_dbc))
+    frames = {
+        entry.arbitration_id: random_frame(radar_dbc, entry.arbitration_id, 7, rng)
+        for entry in rx.object_attribute_list
+    }
+    completed = None
+    for can_id, data in frames.items():
+        assert completed is None
+        completed = batch.add_frame(can_id, data, 7, 0)
+
+    expected = expected_objects(radar_dbc, frames)
+    for name in rx.OBJECT_DTYPE.names:
+        np.testing.assert_allclose(completed[name], expected[name], atol=1e-9)
+    assert batch.decoded_scan_id == 7
+
+
+def test_new_scan_id_completes_the_buffered_scan(radar_dbc):
+    rng = random.Random(2)
+    batch = rx.ScanBatchDecoder(rx.compile_object_decoders(radar_dbc))
+    first = rx.object_attribute_list[0].arbitration_id
+    assert batch.add_frame(first, random_frame(radar_dbc, first, 1, rng), 1, 0) is None
+    completed = batch.add_frame(first, random_frame(radar_dbc, first, 2, rng), 2, 0)
+    assert completed is not None
+    assert batch.decoded_scan_id == 1
+
+
+def test_generic_fallback_keeps_slots_by_object_id(radar_dbc):
+    rng = random.Random(3)
+    decoders = rx.compile_object_decoders(radar_dbc)
+    # one frame pair left to the generic decoder
+    fallback_id = rx.object_attribute_list[5].arbitration_id
+    del decoders[fallback_id]
+    batch = rx.ScanBatchDecoder(decoders)
+
+    assert len(batch.objects) == len(rx.radar_view.objects)
+    assert batch.objects["object_id"].tolist() == list(range(len(batch.objects)))
+    assert 10 not in batch.slots and 11 not in batch.slots
+
+    frames = {
+        can_id: random_frame(radar_dbc, can_id, 3, rng) for can_id in batch.row_of
+    }
+    completed = None
+    for can_id, data in frames.items():
+        completed = batch.add_frame(can_id, data, 3, 0)
+    assert completed is not None
+
+    last = rx.object_attribute_list[-1]
+    decoded = radar_dbc.decode_message(last.arbitration_id, frames[last.arbitration_id])
+    assert completed["lat_pos"][29] == pytest.approx(
+        decoded[last.msg_obj_prop.second_obj_prop.lat_pos_signal]
+    )
+
+
+def test_scan_cut_short_marks_missing_objects_invalid(radar_dbc):
+    rng = random.Random(4)
+    batch = rx.ScanBatchDecoder(rx.compile_object_decoders(radar_dbc))
+    first, second = (entry.arbitration_id for entry in rx.object_attribute_list[:2])
+    for can_id in batch.row_of:
+        batch.add_frame(can_id, random_frame(radar_dbc, can_id, 5, rng), 5, 0)
+    batch.add_frame(first, random_frame(radar_dbc, first, 6, rng), 6, 0)
+    completed = batch.add_frame(second, random_frame(radar_dbc, second, 7, rng), 7, 0)
+
+    assert batch.decoded_scan_id == 6
+    object_ids = completed["object_id"]
+    assert object_ids[:2].tolist() == [0, 1]
+    assert (object_ids[2:] == rx.INVALID_OBJECT_ID).all()
+
+
+def test_radar_view_marks_missing_frames_invalid():
+    view = rx.RadarView()
+    view.begin_frame(1, 0)
+    view.end_frame(0)
+    view.end_frame(2)
+    view.begin_frame(2, 0)
+
+    snapshot = rx.RadarView()
+    assert view.read_published(snapshot)
+    object_ids = snapshot.objects["object_id"]
+    assert object_ids[[0, 1, 4, 5]].tolist() == [0, 1, 4, 5]
+    assert (object_ids[[2, 3]] == rx.INVALID_OBJECT_ID).all()
+    assert (object_ids[6:] == rx.INVALID_OBJECT_ID).all()
+
+
+@pytest.mark.parametrize("byte_order", ["little_endian", "big_endian"])
+@pytest.mark.parametrize("length", [40, 64, 72])
+def test_compiled_decoder_takes_frames_off_the_dbc_length(byte_order, length):
+    radar_dbc = build_radar_dbc(byte_order)
+    rng = random.Random(4)
+    entry = rx.object_attribute_list[0]
+    decoder = rx.compile_object_decoders(radar_dbc)[entry.arbitration_id]
+    frame = random_frame(radar_dbc, entry.arbitration_id, 4, rng)
+    # a short frame decodes like the same frame zero padded to the DBC length
+    data = (frame + bytes(range(8)))[:length]
+    padded = data[:64].ljust(64, b"\x00")
+
+    records = rx.new_object_records()
+    raw_le, raw_be = decoder.unpack(data)
+    assert decoder.decode_header(raw_le, raw_be)[0] == 4
+    decoder.decode_objects_into(raw_le, raw_be, records)
+    decoded = radar_dbc.decode_message(entry.arbitration_id, padded)
+    prop = entry.msg_obj_prop.first_obj_prop
+    for field, name in zip(rx.OBJECT_SIGNAL_FIELDS, rx.OBJECT_DTYPE.names[1:]):
+        assert records[name][0] == pytest.approx(decoded[getattr(prop, field)])
@@ -0,0 +1,24 @@
+from can_log import CanLogRecorder, CanLogReplay
+from rx_engine import RawFrame
+
+
+def test_recorded_batches_replay_frame_by_frame(tmp_path):
+    path = str(tmp_path / "rx.canlog")
+    recorder = CanLogRecorder(path)
+    handled = []
+    tapped = recorder.tap_batch(1, handled.append)
+    batch = [
+        RawFrame(0x140, 10.0, memoryview(bytearray(b"\x01" * 8))),
+        RawFrame(0x141, 10.5, bytearray(b"\x02" * 64)),
+    ]
+    tapped(batch)
+    recorder.close()
+    assert handled == [batch]
+
+    log = CanLogReplay(path)
+    assert len(log) == 2 and log.duration() == 0.5
+    assert [
+        (bus, frame.arbitration_id, frame.timestamp, bytes(frame.data))
+        for bus, frame in log.frames()
+    ] == [(1, 0x140, 10.0, b"\x01" * 8), (1, 0x141, 10.5, b"\x02" * 64)]
+    log.close()
@@ -0,0 +1,75 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+import pytest
+from pygame.sprite import Group
+import draw_2D
+import rx
+
+
+@pytest.fixture
+def screen(monkeypatch):
+    pygame.init()
+    monkeypatch.setattr(draw_2D, "_vehicle_pool", {})
+    yield pygame.Surface((400, 600))
+    pygame.quit()
+
+
+def published_view(valid_slots):
+    view = rx.RadarView()
+    objects = view.objects
+    objects["object_id"] = rx.INVALID_OBJECT_ID
+    for slot in valid_slots:
+        objects[slot] = (slot, 1, 50, 40, 20, 0, 0, 100 + 30 * slot, 0, 0, 200, 0, 0, 0)
+    view.publish_seq = 1
+    return view
+
+
+def test_vehicles_of_invalid_slots_leave_the_group(screen):
+    group = Group()
+    draw_2D.update_vehicle(screen, group, published_view([0, 1, 2]))
+    assert sorted(v.id for v in group) == [0, 1, 2]
+
+    draw_2D.update_vehicle(screen, group, published_view([0, 2]))
+    assert sorted(v.id for v in group) == [0, 2]
+
+    # the pooled sprite comes back with its slot
+    draw_2D.update_vehicle(screen, group, published_view([0, 1, 2]))
+    assert sorted(v.id for v in group) == [0, 1, 2]
+    assert draw_2D._vehicle_pool[1] in group
+
+
+def test_vehicle_is_centred_on_its_reported_position(screen):
+    group = Group()
+    view = published_view([3])
+    view.objects["lgt_velocity"][3] = 5.0
+    draw_2D.update_vehicle(screen, group, view)
+    (veh,) = group
+    assert veh.rect.center == (190, 200)
+    assert veh.rect.size == (20, 40)
+
+    # positions predicted to the render instant replace the reported ones
+    lat = view.objects["lat_pos"].copy()
+    lgt = view.objects["lgt_pos"].copy()
+    lgt[3] += 15
+    draw_2D.update_vehicle(screen, group, view, (lat, lgt))
+    assert veh.rect.center == (190, 215)
+
+
+def test_track_ids_are_drawn_as_their_own_cached_label(screen, monkeypatch):
+    cache = draw_2D.text_cache.__class__()
+    monkeypatch.setattr(draw_2D, "text_cache", cache)
+    group = Group()
+    view = published_view([0, 1])
+    track_ids = np.full(len(view.objects), -1)
+    track_ids[:2] = (7, 8)
+    for step in range(5):
+        view.objects["lgt_pos"][:2] += 5
+        draw_2D.update_vehicle(screen, group, view, None, track_ids)
+    track_labels = [key[0] for key in cache.surfaces if key[0].startswith("#")]
+    assert sorted(track_labels) == ["#7", "#8"]
+    # the vehicle label keeps its class only
+    assert {veh.label for veh in group} == {"Car"}
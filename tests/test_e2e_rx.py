@@ -0,0 +1,91 @@
+import os
+import e2e
+import pytest
+from e2e_rx import (
+    E2E_CRC_FAIL,
+    E2E_LOST,
+    E2E_OK,
+    E2E_REPEATED,
+    E2E_WRONG_SEQUENCE,
+    E2ERxVerifier,
+)
+
+CAN_ID = 0x140
+DATA_ID = 0x8CF
+
+
+def protected_frames(count: int, size: int = 64, data_id: int = DATA_ID):
+    """Consecutive frames of one CAN ID, counter advancing by one"""
+    data = bytearray(os.urandom(size))
+    frames = []
+    for _ in range(count):
+        e2e.p05.e2e_p05_protect(data, data_id, length=size - 2)
+        frames.append(bytes(data))
+    return frames
+
+
+@pytest.mark.parametrize("size", [8, 16, 64])
+def test_crc_agrees_with_the_e2e_library(size):
+    for _ in range(200):
+        data = bytearray(os.urandom(size))
+        if data[0] & 1:
+            e2e.p05.e2e_p05_protect(data, DATA_ID, length=size - 2)
+        verifier = E2ERxVerifier({CAN_ID: DATA_ID})
+        valid = e2e.p05.e2e_p05_check(data, DATA_ID, length=size - 2)
+        assert (verifier.check(CAN_ID, memoryview(data)) != E2E_CRC_FAIL) == valid
+
+
+def test_counter_continuity():
+    frames = protected_frames(10)
+    verifier = E2ERxVerifier({CAN_ID: DATA_ID}, max_delta_counter=3)
+    received = [frames[0], frames[1], frames[1], frames[3], frames[9], frames[5]]
+    statuses = [verifier.check(CAN_ID, frame) for frame in received]
+    assert statuses == [
+        E2E_OK,
+        E2E_OK,
+        E2E_REPEATED,
+        E2E_LOST,
+        E2E_WRONG_SEQUENCE,
+        E2E_WRONG_SEQUENCE,
+    ]
+    stats = verifier.stats()[CAN_ID]
+    assert stats["lost"] == 1 and stats["lost_frames"] == 1
+    assert stats["wrong_sequence"] == 2
+
+
+def test_wrong_data_id_fails_the_crc():
+    frame = protected_frames(1)[0]
+    verifier = E2ERxVerifier({CAN_ID: DATA_ID + 1})
+    assert verifier.check(CAN_ID, frame) == E2E_CRC_FAIL
+
+
+def test_drop_policy_rejects_failed_frames_flag_policy_keeps_them():
+    frame = protected_frames(1)[0]
+    corrupted = bytearray(frame)
+    corrupted[10] ^= 0x01
+    dropping = E2ERxVerifier({CAN_ID: DATA_ID}, policy="drop")
+    flagging = E2ERxVerifier({CAN_ID: DATA_ID}, policy="flag")
+    assert not dropping.accept(CAN_ID, corrupted)
+    assert flagging.accept(CAN_ID, corrupted)
+    assert dropping.dropped == 1 and flagging.dropped == 0
+    assert flagging.stats()[CAN_ID]["crc_fail"] == 1
+    # unprotected IDs pass untouched
+    assert dropping.accept(0x999, b"\x00")
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        E2ERxVerifier({CAN_ID: DATA_ID}, policy="ignore")
+
+
+def test_ids_sharing_a_data_id_keep_their_own_counters():
+    # 0x148 and 0x14A both carry data id 0x8D3
+    verifier = E2ERxVerifier({0x148: 0x8D3, 0x14A: 0x8D3})
+    first = protected_frames(4, data_id=0x8D3)
+    # the other ID's counter is a step ahead
+    second = protected_frames(5, data_id=0x8D3)[1:]
+    statuses = []
+    for a, b in zip(first, second):
+        statuses.append(verifier.check(0x148, a))
+        statuses.append(verifier.check(0x14A, b))
+    assert statuses == [E2E_OK] * 8
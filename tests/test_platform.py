@@ -0,0 +1,25 @@
+import defines
+import temperature
+
+
+def test_platform_is_probed_once(monkeypatch):
+    calls = []
+
+    def probe():
+        calls.append(1)
+        return defines.PlatformConfig("", False, False, "", "simulated")
+
+    monkeypatch.setattr(defines, "probe_platform", probe)
+    monkeypatch.setattr(defines, "_platform_config", None)
+    assert defines.get_platform_config() is defines.get_platform_config()
+    assert not defines.is_raspberrypi()
+    assert len(calls) == 1
+
+
+def test_temperature_sampler_starts_from_the_probed_source(monkeypatch):
+    config = defines.PlatformConfig("", False, False, "", "simulated")
+    monkeypatch.setattr(defines, "_platform_config", config)
+    sampler = temperature.TemperatureSampler(interval=60)
+    sampler.start()
+    sampler.stop()
+    assert sampler.source == "simulated"
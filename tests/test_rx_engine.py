@@ -0,0 +1,124 @@
+import socket
+import struct
+import threading
+import can
+import pytest
+import rx_engine
+
+
+@pytest.fixture
+def virtual_bus():
+    sender = can.Bus(interface="virtual", channel="test_rx", receive_own_messages=False)
+    receiver = can.Bus(interface="virtual", channel="test_rx")
+    yield sender, receiver
+    sender.shutdown()
+    receiver.shutdown()
+
+
+def send_frames(bus, count):
+    for i in range(count):
+        bus.send(can.Message(arbitration_id=0x140 + i, data=bytes([i]) * 8))
+
+
+def test_queue_listener_keeps_the_newest_frames():
+    listener = rx_engine.BoundedQueueListener(2)
+    for i in range(5):
+        listener.on_message_received(can.Message(arbitration_id=i))
+    assert listener.dropped == 3
+    assert [listener.queue.get().arbitration_id for _ in range(2)] == [3, 4]
+
+
+def test_engine_hands_every_frame_to_its_handler(virtual_bus):
+    sender, receiver = virtual_bus
+    received = []
+    done = threading.Event()
+
+    def handler(msg):
+        received.append(msg.arbitration_id)
+        if len(received) == 10:
+            done.set()
+
+    engine = rx_engine.RxEngine()
+    engine.add_bus("CAN0", receiver, handler)
+    engine.start()
+    send_frames(sender, 10)
+    assert done.wait(2.0)
+    engine.stop()
+    assert received == [0x140 + i for i in range(10)]
+    assert engine.format_dropped() == "RX dropped frames: CAN0 0"
+
+
+def canfd_frame(can_id, data):
+    return struct.pack("=IB3x", can_id, len(data)) + data.ljust(64, b"\x00")
+
+
+@pytest.fixture
+def datagram_pair():
+    # A UDP socket takes the same recvmmsg path and ancillary data as a raw
+    # CAN socket, and drops datagrams once its receive buffer is full
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    receiver.setsockopt(socket.SOL_SOCKET, rx_engine.SO_TIMESTAMPNS, 1)
+    receiver.bind(("127.0.0.1", 0))
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender.connect(receiver.getsockname())
+    yield sender, receiver
+    sender.close()
+    receiver.close()
+
+
+@pytest.mark.skipif(rx_engine._recvmmsg is None, reason="no recvmmsg")
+def test_socket_reader_reads_a_batch_per_call(datagram_pair):
+    sender, receiver = datagram_pair
+    reader = rx_engine.SocketCanBatchReader(receiver, 4)
+    for i in range(6):
+        sender.send(canfd_frame(0x140 + i, bytes([i]) * 8))
+
+    frames = reader.read_batch(1.0)
+    assert [f.arbitration_id for f in frames] == [0x140, 0x141, 0x142, 0x143]
+    assert bytes(frames[3].data) == bytes([3]) * 8
+    # kernel timestamps, not the time of the read
+    assert frames[0].timestamp <= frames[3].timestamp
+    frames = reader.read_batch(1.0)
+    assert [f.arbitration_id for f in frames] == [0x144, 0x145]
+    assert reader.read_batch(0.01) == []
+
+
+@pytest.mark.skipif(rx_engine._recvmmsg is None, reason="no recvmmsg")
+def test_socket_reader_keeps_the_kernel_drop_counter(datagram_pair):
+    sender, receiver = datagram_pair
+    reader = rx_engine.SocketCanBatchReader(receiver, 16)
+    for i in range(200):
+        sender.send(canfd_frame(0x140, bytes(8)))
+    received = 0
+    frames = reader.read_batch(1.0)
+    while frames:
+        received += len(frames)
+        frames = reader.read_batch(0.01)
+    # the counter arrives with the first frame queued after the drops
+    sender.send(canfd_frame(0x7FF, bytes(8)))
+    assert len(reader.read_batch(1.0)) == 1
+    assert reader.dropped == 200 - received > 0
+
+
+def test_batch_receiver_hands_whole_batches_to_the_batch_handler(
+    virtual_bus, monkeypatch
+):
+    sender, receiver = virtual_bus
+    monkeypatch.setattr(rx_engine, "rx_batch_read", True)
+    batches = []
+    done = threading.Event()
+
+    def batch_handler(frames):
+        batches.append([f.arbitration_id for f in frames])
+        if sum(map(len, batches)) == 10:
+            done.set()
+
+    engine = rx_engine.RxEngine()
+    engine.add_bus("CAN0", receiver, None, batch_handler)
+    send_frames(sender, 10)
+    engine.start()
+    assert done.wait(2.0)
+    engine.stop()
+    assert batches == [[0x140 + i for i in range(10)]]
+    assert engine.format_dropped() == "RX dropped frames: CAN0 0"
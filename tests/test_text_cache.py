@@ -0,0 +1,41 @@
+import pygame
+import pytest
+from text_cache import TextCache
+
+
+@pytest.fixture(autouse=True)
+def pygame_font():
+    pygame.font.init()
+    yield
+    pygame.font.quit()
+
+
+def test_render_is_cached_per_text_and_style():
+    cache = TextCache(max_entries=8)
+    font = cache.get_font(14)
+    first = font.render("CAN ID", True, (255, 255, 255))
+    assert font.render("CAN ID", True, (255, 255, 255)) is first
+    assert font.render("CAN ID", True, (0, 255, 0)) is not first
+    assert cache.get_font(14) is font
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TextCache(max_entries=2)
+    font = cache.get_font(14)
+    label = font.render("label", True, (255, 255, 255))
+    font.render("a", True, (255, 255, 255))
+    # touching the label keeps it, "a" is now the oldest entry
+    assert font.render("label", True, (255, 255, 255)) is label
+    font.render("b", True, (255, 255, 255))
+    assert len(cache.surfaces) == 2
+    assert font.render("label", True, (255, 255, 255)) is label
+
+
+def test_uncached_render_leaves_the_cache_alone():
+    cache = TextCache(max_entries=2)
+    font = cache.get_font(14)
+    label = font.render("label", True, (255, 255, 255))
+    for i in range(10):
+        font.render_uncached(f"{i:016X}", True, (255, 255, 255))
+    assert len(cache.surfaces) == 1
+    assert font.render("label", True, (255, 255, 255)) is label
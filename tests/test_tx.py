@@ -0,0 +1,200 @@
+import threading
+import time
+import can
+import e2e
+import pytest
+import tx
+
+
+@pytest.fixture
+def virtual_bus():
+    sender = can.Bus(interface="virtual", channel="test_tx", receive_own_messages=False)
+    receiver = can.Bus(interface="virtual", channel="test_tx")
+    yield sender, receiver
+    sender.shutdown()
+    receiver.shutdown()
+
+
+def received_ids(bus):
+    ids = []
+    msg = bus.recv(0)
+    while msg is not None:
+        ids.append(msg.arbitration_id)
+        msg = bus.recv(0)
+    return ids
+
+
+def run_scheduler(scheduler, seconds):
+    thread = threading.Thread(target=scheduler.run, args=(scheduler._stop_event,))
+    thread.start()
+    time.sleep(seconds)
+    scheduler._stop_event.set()
+    thread.join()
+
+
+def test_0x210_sections_protect_all_but_their_last_two_bytes(virtual_bus):
+    sender, receiver = virtual_bus
+    sections = (
+        (tx.data_210_tx_msg_carConfig, tx.length_210_carConfig, 0xA35),
+        (tx.data_210_tx_msg_PowerMode, tx.length_210_PowerMode, 0xD0B),
+    )
+    # the frame is cut into the two sections, same convention as the RX check
+    assert b"".join(bytes(data) for data, _, _ in sections) == tx.data_210_tx_msg
+    assert [length for data, length, _ in sections] == [3, 5]
+
+    tx.process_CAN0_tx(sender, [tx.PID_CARCONFIG])
+    frame = receiver.recv(1).data
+    for data, length, data_id in sections:
+        part, frame = frame[: len(data)], frame[len(data) :]
+        assert e2e.p05.e2e_p05_check(part, data_id, length=len(part) - 2)
+
+
+# 0x240 is too short to protect, see the disabled message test
+@pytest.mark.parametrize(
+    "arbitration_id", [tx.PID_CARCONFIG, tx.PID_GLOBALSNAPSHOT, tx.PID_VEHMODES]
+)
+def test_payload_cache_frames_are_protected(arbitration_id):
+    sections = tx.CAN0_TX_SECTIONS[arbitration_id]
+    cache = tx.E2EPayloadCache(sections)
+    counters = []
+    for _ in range(tx.E2E_P05_COUNTER_CYCLE + 2):
+        frame = cache.next()
+        offset = 0
+        for buffer, length, section_offset, data_id in sections:
+            part = frame[offset : offset + len(buffer)]
+            assert e2e.p05.e2e_p05_check(
+                part, data_id, length=length, offset=section_offset
+            )
+            offset += len(buffer)
+        counters.append(frame[2])
+    assert counters[:3] == [1, 2, 3]
+    # the 8 bit counter wraps with the cycle
+    assert counters[255:258] == [0, 1, 2]
+
+
+def test_payload_cache_rebuilds_on_change_and_keeps_the_counter():
+    buffer = bytearray(8)
+    cache = tx.E2EPayloadCache([(buffer, 6, 0, 0x123)])
+    for _ in range(5):
+        cache.next()
+    buffer[4] = 0x55
+    frame = cache.next()
+    assert frame[4] == 0x55 and frame[2] == 6
+    assert e2e.p05.e2e_p05_check(frame, 0x123, length=6)
+    # the buffer stays the unprotected template
+    assert buffer[:3] == bytearray(3)
+
+
+def test_protected_lengths_leave_out_the_last_two_bytes():
+    # same convention as the RX check, length = frame length - 2
+    for arbitration_id, sections in tx.CAN0_TX_SECTIONS.items():
+        for buffer, length, _, _ in sections:
+            assert length == len(buffer) - 2, hex(arbitration_id)
+
+
+def test_message_whose_cycle_cannot_be_built_is_disabled(virtual_bus, monkeypatch):
+    sender, receiver = virtual_bus
+    # a 2 byte protected length leaves no room for the 3 byte header
+    broken = tx.E2EPayloadCache([(bytearray(4), 2, 0, 0xB7A)])
+    monkeypatch.setitem(tx.tx_payload_caches, tx.PID_FUNCINFO, broken)
+    monkeypatch.setattr(tx, "tx_offload_mode", False)
+    scheduler = tx.start_tx_scheduler(sender, sender)
+    time.sleep(0.1)
+    scheduler.stop()
+    cyclic = scheduler.tasks["0x200-0x240 60ms"]
+    assert tx.PID_FUNCINFO not in cyclic.args[1]
+    assert cyclic.stats.errors == 0
+    ids = received_ids(receiver)
+    assert tx.PID_VEHMOTIONSTATE in ids and tx.PID_FUNCINFO not in ids
+
+
+def test_failing_message_does_not_hold_back_the_batch(virtual_bus, monkeypatch):
+    sender, receiver = virtual_bus
+
+    def broken(ts):
+        raise ValueError("broken payload")
+
+    monkeypatch.setitem(tx.CAN0_TX_PREPARE, tx.PID_CARCONFIG, broken)
+    tx_ids = [tx.PID_VEHMOTIONSTATE, tx.PID_CARCONFIG, tx.PID_GLOBALSNAPSHOT]
+    with pytest.raises(ValueError, match="0x210"):
+        tx.process_CAN0_tx(sender, tx_ids)
+    assert received_ids(receiver) == [tx.PID_VEHMOTIONSTATE, tx.PID_GLOBALSNAPSHOT]
+
+
+def test_batch_reuses_the_preallocated_messages(virtual_bus):
+    sender, receiver = virtual_bus
+    tx_ids = [tx.PID_VEHMOTIONSTATE, tx.PID_CARCONFIG, tx.PID_VEHMODES]
+    tx.process_CAN0_tx(sender, tx_ids)
+    first = tx.msg_230.data[2]
+    tx.process_CAN0_tx(sender, tx_ids)
+    assert received_ids(receiver) == tx_ids * 2
+    # same message object, its data advanced to the next counter
+    assert tx.CAN0_TX_PREPARE[tx.PID_VEHMODES](0) is tx.msg_230
+    assert tx.msg_230.data[2] == (first + 2) % tx.E2E_P05_COUNTER_CYCLE
+
+
+def test_scheduler_runs_tasks_in_deadline_order():
+    scheduler = tx.TxScheduler()
+    calls = []
+    scheduler.add("a", 40, calls.append, "a")
+    scheduler.add("b", 100, calls.append, "b", offset_ms=20)
+    run_scheduler(scheduler, 0.23)
+    # a: 0, 40, 80, 120, 160, 200   b: 20, 120, 220
+    assert calls[:8] == ["a", "b", "a", "a", "a", "b", "a", "a"]
+
+
+def test_task_that_raises_stays_scheduled(capsys):
+    scheduler = tx.TxScheduler()
+    calls = []
+
+    def failing():
+        calls.append(time.monotonic())
+        raise ValueError("send failed")
+
+    scheduler.add("failing", 10, failing)
+    run_scheduler(scheduler, 0.055)
+    assert len(calls) >= 4
+    assert scheduler.metrics()["failing"]["errors"] == len(calls)
+    # a repeated error is only printed once
+    assert capsys.readouterr().out.count("send failed") == 1
+
+
+@pytest.mark.parametrize("policy, skipped", [("skip", 2), ("catch_up", 0)])
+def test_overrun_policy(policy, skipped):
+    scheduler = tx.TxScheduler(policy=policy, max_catch_up=3)
+    calls = []
+
+    def stalling():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            # 3.5 periods late, three deadlines have passed
+            time.sleep(0.175)
+
+    scheduler.add("stalling", 50, stalling)
+    run_scheduler(scheduler, 0.2)
+    assert scheduler.metrics()["stalling"]["skipped"] == skipped
+
+
+def test_unknown_overrun_policy_is_rejected():
+    with pytest.raises(ValueError):
+        tx.TxScheduler(policy="drop")
+
+
+def test_offload_reloads_the_cycle_of_a_changed_payload(virtual_bus, monkeypatch):
+    sender, receiver = virtual_bus
+    buffer = bytearray(8)
+    monkeypatch.setitem(tx.CAN0_TX_SECTIONS, tx.PID_VEHMODES, [(buffer, 6, 0, 0x123)])
+    offload = tx.TxOffload(sender, 60)
+    offload.update(tx.PID_VEHMODES)
+    try:
+        task = offload.tasks[tx.PID_VEHMODES]
+        offload.refresh()
+        assert task.messages[0].data[4] == 0
+        buffer[4] = 0x55
+        offload.refresh()
+        # same task, new cycle through modify_data
+        assert offload.tasks[tx.PID_VEHMODES] is task
+        assert all(msg.data[4] == 0x55 for msg in task.messages)
+        assert e2e.p05.e2e_p05_check(task.messages[0].data, 0x123, length=6)
+    finally:
+        offload.stop()